@@ -0,0 +1,70 @@
+"""Lookup rate against a synthetic breach database of configurable size.
+
+    python benchmarks/bench_breach.py --size-mb 256 --lookups 100000
+    python benchmarks/bench_breach.py --size-mb 4096   # HIBP-sized, needs the disk space
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import synthetic  # noqa: F401  puts the repo root on sys.path
+from vault_breach import RECORD_SIZE, BreachChecker
+
+CHUNK_RECORDS = 1_000_000
+
+
+def write_database(path, count, seed=42):
+    """Write count sorted, uniformly spread random digests, one prefix range per chunk"""
+    rng = random.Random(seed)
+    chunks = max(1, count // CHUNK_RECORDS)
+    span = (1 << 64) // chunks
+    with open(path, "wb") as f:
+        for c in range(chunks):
+            n = count // chunks + (1 if c < count % chunks else 0)
+            prefixes = sorted(c * span + rng.randrange(span) for _ in range(n))
+            tails = rng.randbytes(12 * n)
+            f.write(b"".join(prefix.to_bytes(8, "big") + tails[i * 12:(i + 1) * 12]
+                             for i, prefix in enumerate(prefixes)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--dir", help="where to build the database (default: a temp dir)")
+    args = parser.parse_args()
+
+    count = args.size_mb * 1024 * 1024 // RECORD_SIZE
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "breach.bin")
+        start = time.perf_counter()
+        write_database(path, count)
+        print(f"built {count:,} records ({args.size_mb} MB) in {time.perf_counter() - start:.1f}s")
+
+        checker = BreachChecker(path)
+        rng = random.Random(7)
+        # Half the probes are records from the file, half random digests that won't be
+        present = [checker._at(rng.randrange(count)) for _ in range(args.lookups // 2)]
+        absent = [rng.randbytes(RECORD_SIZE) for _ in range(args.lookups - len(present))]
+        probes = present + absent
+        rng.shuffle(probes)
+
+        start = time.perf_counter()
+        hits = sum(1 for digest in probes if checker.contains_digest(digest))
+        elapsed = time.perf_counter() - start
+        assert hits == len(present), f"expected {len(present)} hits, got {hits}"
+        print(f"{len(probes) / elapsed:>12,.0f} digest lookups/s ({elapsed / len(probes) * 1e6:.1f} us each)")
+
+        passwords = [f"synthetic-{i}" for i in range(args.lookups)]
+        start = time.perf_counter()
+        for password in passwords:
+            password in checker
+        elapsed = time.perf_counter() - start
+        print(f"{len(passwords) / elapsed:>12,.0f} password checks/s incl. SHA-1")
+        checker.close()
+
+
+if __name__ == "__main__":
+    main()
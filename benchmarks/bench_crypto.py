@@ -0,0 +1,56 @@
+"""Unlock time and per-entry reveal latency for encrypted vaults of growing size.
+
+    python benchmarks/bench_crypto.py --sizes 1k,10k,100k
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_crypto import VaultCipher
+from vault_index import PasswordIndex
+from vault_storage import JournalStorage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k")
+    parser.add_argument("--reveals", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'load s':>8} {'unlock ms':>10} {'reveal us':>10}")
+    for size in parse_sizes(args.sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            data_file = os.path.join(tmp, "vault.json")
+            cipher = VaultCipher(os.path.join(tmp, "vault.key.json"))
+            cipher.setup("benchmark")
+            storage = JournalStorage(data_file)
+            storage.load()
+            storage.apply([("add", cipher.seal(entry)) for entry in make_entries(size)])
+            storage.close()
+
+            # Startup: read and index the vault without decrypting anything
+            start = time.perf_counter()
+            storage = JournalStorage(data_file)
+            index = PasswordIndex(storage.load()["websites"])
+            load = time.perf_counter() - start
+            storage.close()
+
+            cipher = VaultCipher(os.path.join(tmp, "vault.key.json"))
+            start = time.perf_counter()
+            cipher.unlock("benchmark")
+            unlock = (time.perf_counter() - start) * 1000
+
+            picks = random.Random(7).choices(index.to_list(), k=args.reveals)
+            start = time.perf_counter()
+            for entry in picks:
+                cipher.reveal(entry)
+            reveal = (time.perf_counter() - start) / args.reveals * 1e6
+
+        print(f"{size:>10} {load:>8.2f} {unlock:>10.1f} {reveal:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Load test for the vault daemon: requests/second and latency with many concurrent clients.
+
+Starts the daemon on a synthetic vault in a subprocess, then drives it from
+asyncio clients that each send requests back to back.
+
+    python benchmarks/bench_daemon.py --size 100k --clients 1,16,64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, make_entries, parse_sizes
+from vault_daemon import VaultClient
+
+
+def wait_for_daemon(socket_path, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("daemon exited during startup")
+        try:
+            client = VaultClient(socket_path)
+        except RuntimeError:
+            time.sleep(0.05)
+            continue
+        client.request("ping")
+        client.close()
+        return
+    raise RuntimeError("daemon did not start in time")
+
+
+def make_requests(entries, count, seed):
+    """A mix of exact gets, URL lookups and searches"""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        entry = rng.choice(entries)
+        kind = rng.random()
+        if kind < 0.5:
+            requests.append({"op": "get", "website": entry["website"], "username": entry["username"]})
+        elif kind < 0.8:
+            requests.append({"op": "lookup", "url": f"https://{entry['website']}/login"})
+        else:
+            requests.append({"op": "search", "query": entry["username"][:8], "limit": 20})
+    return requests
+
+
+async def client(socket_path, requests, latencies):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    for request in requests:
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        assert response["ok"], response
+    writer.close()
+
+
+async def drive(socket_path, entries, clients, per_client):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(socket_path, make_requests(entries, per_client, seed), latencies)
+                           for seed in range(clients)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="100k", help="entries in the synthetic vault")
+    parser.add_argument("--clients", default="1,16,64", help="concurrent client counts to try")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per client")
+    args = parser.parse_args()
+
+    entries = make_entries(parse_sizes(args.size)[0])
+    with tempfile.TemporaryDirectory() as tmp:
+        vault = os.path.join(tmp, "password_vault.json")
+        with open(vault, "w") as f:
+            json.dump({"websites": entries}, f)
+        socket_path = os.path.join(tmp, "vault.sock")
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, "vault_cli.py"), "daemon",
+                                    "--vault", vault, "--backend", "json", "--socket", socket_path],
+                                   stderr=subprocess.DEVNULL)
+        try:
+            wait_for_daemon(socket_path, process)
+            print(f"{'clients':>8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+            for clients in parse_sizes(args.clients):
+                elapsed, latencies = asyncio.run(drive(socket_path, entries, clients, args.requests))
+                total = len(latencies)
+                p50 = latencies[total // 2] * 1000
+                p99 = latencies[min(total - 1, int(total * 0.99))] * 1000
+                print(f"{clients:>8} {total:>9} {total / elapsed:>9,.0f} {p50:>8.2f} {p99:>8.2f} "
+                      f"{latencies[-1] * 1000:>8.2f}")
+        finally:
+            process.send_signal(signal.SIGTERM)
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
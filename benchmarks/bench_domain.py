@@ -0,0 +1,62 @@
+"""URL lookups with DomainIndex against scanning every entry's website.
+
+    python benchmarks/bench_domain.py --sizes 1k,100k,1m
+"""
+import argparse
+import random
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_index import DomainIndex, canonical_host, registrable_domain
+
+
+def scan(entries, url):
+    """The manual alternative: canonicalize and compare every stored website"""
+    host = canonical_host(url)
+    domain = registrable_domain(host)
+    found = []
+    for entry in entries:
+        stored = canonical_host(entry["website"])
+        if stored and (stored == host or host.endswith("." + stored) or stored.endswith("." + host)) \
+                and stored.endswith(domain):
+            found.append(entry)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--scans", type=int, default=5, help="full scans to time (they're slow)")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'build s':>9} {'lookup us':>10} {'scan us':>10}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size)
+        # Give a quarter of the sites a login. subdomain so parent matches happen
+        for entry in entries[::4]:
+            entry["website"] = "login." + entry["website"]
+        start = time.perf_counter()
+        index = DomainIndex(entries)
+        build = time.perf_counter() - start
+
+        rng = random.Random(3)
+        urls = [f"https://accounts.login.{canonical_host(e['website'])}/sign-in?next=/"
+                for e in rng.choices(entries, k=args.lookups)]
+        start = time.perf_counter()
+        for url in urls:
+            index.search(url)
+        lookup_us = (time.perf_counter() - start) / len(urls) * 1e6
+
+        scan_urls = urls[:args.scans]
+        start = time.perf_counter()
+        for url in scan_urls:
+            expected = scan(entries, url)
+        scan_us = (time.perf_counter() - start) / len(scan_urls) * 1e6
+        assert sorted(map(id, index.search(scan_urls[-1]))) == sorted(map(id, expected))
+
+        print(f"{size:>10} {build:>9.2f} {lookup_us:>10.1f} {scan_us:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Passwords per second for the old per-character loop and the bulk generator.
+
+    python benchmarks/bench_generate.py --count 200000
+"""
+import argparse
+import random
+import secrets
+import time
+
+import synthetic  # noqa: F401  puts the repo root on sys.path
+import password_core
+
+
+def rate(func, count):
+    start = time.perf_counter()
+    func(count)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--length", type=int, default=password_core.DEFAULT_LENGTH)
+    args = parser.parse_args()
+
+    chars = password_core.build_charset()
+    length = args.length
+    modes = {
+        "random.choice loop": lambda n: [
+            "".join(random.choice(chars) for _ in range(length)) for _ in range(n)],
+        "secrets.choice loop": lambda n: [
+            "".join(secrets.choice(chars) for _ in range(length)) for _ in range(n)],
+        "generate_batch": lambda n: list(password_core.iter_batches(n, length, chars)),
+    }
+    for name, func in modes.items():
+        print(f"{name:>20}: {rate(func, args.count):>12,.0f} passwords/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Password history: what changing passwords costs, and what it doesn't cost the vault.
+
+Each round changes --changes passwords spread over a vault of --entries.
+"load" is loading the vault afterwards, which never reads the history
+file; "first view" is the first History click, which reads it once;
+"view" is every click after that. "record" includes the fsync that makes
+each old password durable before the vault is touched, and the background
+prunes recording sets off.
+
+    python benchmarks/bench_history.py --entries 10k --changes 100,1k,10k
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from synthetic import make_entries, parse_sizes
+import vault_history
+from vault_history import HistoryStore
+from vault_storage import JournalStorage
+
+
+def ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", default="10k", help="vault size")
+    parser.add_argument("--changes", default="100,1k,10k", help="password changes recorded per round")
+    parser.add_argument("--keep-versions", type=int, default=vault_history.KEEP_VERSIONS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    size = parse_sizes(args.entries)[0]
+    entries = make_entries(size)
+    print(f"{'changes':>10} {'record us':>10} {'history KB':>11} {'load ms':>8} {'first view ms':>14} "
+          f"{'view us':>8} {'prune ms':>9} {'dropped':>8}")
+    for changes in parse_sizes(args.changes):
+        with tempfile.TemporaryDirectory() as tmp:
+            vault = os.path.join(tmp, "vault.json")
+            with open(vault, "w") as f:
+                json.dump({"websites": entries}, f)
+            history = HistoryStore(os.path.join(tmp, "vault.history"), keep_versions=args.keep_versions)
+            rng = random.Random(changes)
+            changed = [rng.choice(entries) for _ in range(changes)]
+
+            start = time.perf_counter()
+            for i, entry in enumerate(changed):
+                history.record(entry, f"2025-01-01 {i % 24:02d}:00")
+            record = (time.perf_counter() - start) / changes * 1e6
+            # Recording kicks off background prunes; let them settle before timing
+            history.close()
+            kb = os.path.getsize(history.path) / 1024
+
+            load = statistics.median(ms(lambda: JournalStorage(vault).load())[0] for _ in range(args.repeat))
+            reader = HistoryStore(history.path)
+            first, _ = ms(lambda: reader.versions(changed[0]["website"], changed[0]["username"]))
+            view = statistics.median(
+                ms(lambda: reader.versions(entry["website"], entry["username"]))[0] for entry in changed[:100])
+
+            with open(history.path, "a") as f:
+                for i, entry in enumerate(changed):
+                    f.write(json.dumps(dict(entry, date_changed="2025-01-02 00:00")) + "\n")
+            prune, dropped = ms(history.prune)
+        print(f"{changes:>10} {record:>10.1f} {kb:>11,.0f} {load:>8.1f} {first:>14.1f} "
+              f"{view * 1000:>8.1f} {prune:>9.1f} {dropped:>8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Time add/lookup/delete with PasswordIndex against the old linear scans.
+
+    python benchmarks/bench_index.py --sizes 1k,100k,1m
+"""
+import argparse
+import random
+import time
+
+from synthetic import make_entries, make_entry, parse_sizes
+from vault_index import PasswordIndex
+
+
+def per_op_us(func, ops):
+    """Run func over ops and return the mean cost in microseconds"""
+    start = time.perf_counter()
+    for op in ops:
+        func(op)
+    return (time.perf_counter() - start) / len(ops) * 1e6
+
+
+def bench_linear(entries, new_entries, probes):
+    """The pre-index behaviour: scan for dedupe/lookup, rebuild list on delete"""
+    data = list(entries)
+
+    def add(entry):
+        for existing in data:
+            if existing["website"] == entry["website"] and existing["username"] == entry["username"]:
+                return
+        data.append(entry)
+
+    def lookup(entry):
+        for existing in data:
+            if existing["website"] == entry["website"] and existing["username"] == entry["username"]:
+                return existing
+
+    def delete(entry):
+        data[:] = [e for e in data
+                   if not (e["website"] == entry["website"] and e["username"] == entry["username"])]
+
+    return per_op_us(add, new_entries), per_op_us(lookup, probes), per_op_us(delete, probes)
+
+
+def bench_index(entries, new_entries, probes):
+    """The same operations through PasswordIndex"""
+    index = PasswordIndex(entries)
+    add = index.add
+    lookup = lambda e: index.get(e["website"], e["username"])
+    delete = lambda e: index.remove(e["website"], e["username"])
+    return per_op_us(add, new_entries), per_op_us(lookup, probes), per_op_us(delete, probes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k,1m")
+    parser.add_argument("--ops", type=int, default=1000, help="operations per indexed measurement")
+    parser.add_argument("--linear-ops", type=int, default=20, help="operations per linear measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(99)
+    print(f"{'entries':>10} {'mode':>7} {'add us':>12} {'lookup us':>12} {'delete us':>12}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size)
+        new_entries = [make_entry(size + i, rng) for i in range(args.ops)]
+        probes = rng.sample(entries, min(args.ops, size))
+        results = {
+            "linear": bench_linear(entries, new_entries[:args.linear_ops], probes[:args.linear_ops]),
+            "index": bench_index(entries, new_entries, probes),
+        }
+        for mode, (add, lookup, delete) in results.items():
+            print(f"{size:>10} {mode:>7} {add:>12.2f} {lookup:>12.2f} {delete:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Memory held by loaded vault entries: plain dicts against Records (tracemalloc).
+
+    python benchmarks/bench_memory.py --sizes 10k,100k,1m
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from synthetic import make_entries, parse_sizes
+from vault_crypto import masked
+from vault_records import Record
+
+
+def held_bytes(build):
+    """Bytes still allocated by whatever build returns, measured from a JSON string"""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10k,100k")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'dict MB':>9} {'record MB':>10} {'saved':>6} {'dict us/row':>12} {'record us/row':>14}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size)
+        # Several accounts per site, like a real vault
+        for i, entry in enumerate(entries):
+            entry["website"] = entries[i // 3]["website"]
+        text = json.dumps({"websites": entries})
+        del entries
+
+        dicts, dict_bytes = held_bytes(lambda: json.loads(text)["websites"])
+        records, record_bytes = held_bytes(
+            lambda: [Record.from_dict(entry) for entry in json.loads(text)["websites"]])
+
+        # What a Saved tab redraw does per row, before and after
+        sample = dicts[:100_000]
+        start = time.perf_counter()
+        for entry in sample:
+            (entry["website"], entry["username"], masked(entry["password"]), entry["date_added"])
+        dict_us = (time.perf_counter() - start) / len(sample) * 1e6
+        start = time.perf_counter()
+        for entry in records[:100_000]:
+            (entry.website, entry.username, entry.mask, entry.date_added)
+        record_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        print(f"{size:>10} {dict_bytes / 1e6:>9.1f} {record_bytes / 1e6:>10.1f} "
+              f"{1 - record_bytes / dict_bytes:>6.0%} {dict_us:>12.2f} {record_us:>14.2f}")
+        del dicts, records
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Scaling of the sharded generator from 1 to N worker processes.
+
+    python benchmarks/bench_parallel.py --count 2000000 --max-workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import synthetic  # noqa: F401  puts the repo root on sys.path
+import password_core
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--unique", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'seconds':>9} {'passwords/s':>14} {'speedup':>8}")
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        with tempfile.TemporaryDirectory() as shard_dir:
+            start = time.perf_counter()
+            password_core.generate_sharded(args.count, shard_dir, workers=workers, unique=args.unique)
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {args.count / elapsed:>14,.0f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
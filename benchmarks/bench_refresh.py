@@ -0,0 +1,98 @@
+"""Picking up another process's writes: incremental refresh vs a full reload, and watcher latency.
+
+Two JournalStorage instances on one vault stand in for two app windows.
+One adds --changes entries; the other either refreshes (replaying just
+the new journal lines) or reloads the whole vault as it had to before.
+The watcher rows time how long inotify and polling take to notice a write.
+
+    python benchmarks/bench_refresh.py --sizes 1k,10k,100k
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_storage import JournalStorage
+import vault_watch
+
+
+def refresh_vs_reload(path, base, extra, changes, repeat):
+    """Median ms for the reader to see the writer's changes, both ways, and the writer's ms per apply"""
+    with open(path, "w") as f:
+        json.dump({"websites": base}, f)
+    writer = JournalStorage(path, compact_bytes=float("inf"))
+    reader = JournalStorage(path, compact_bytes=float("inf"))
+    writer.load()
+    reader.load()
+    adds = iter(extra)
+    refresh, reload_, apply_ = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(changes):
+            writer.apply([("add", next(adds))])
+        apply_.append((time.perf_counter() - start) / changes * 1000)
+        start = time.perf_counter()
+        seen = reader.refresh()
+        refresh.append((time.perf_counter() - start) * 1000)
+        assert len(seen) == changes
+        start = time.perf_counter()
+        JournalStorage(path).load()
+        reload_.append((time.perf_counter() - start) * 1000)
+    writer.close()
+    reader.close()
+    return statistics.median(refresh), statistics.median(reload_), statistics.median(apply_)
+
+
+def watcher_latency_ms(factory, directory, repeat):
+    """Median ms from a journal append until the watcher calls back"""
+    path = os.path.join(directory, "watched.journal")
+    open(path, "w").close()
+    changed = threading.Event()
+    watcher = factory([path], changed.set)
+    watcher.start()
+    # Let the polling watcher take its first look before anything changes
+    time.sleep(0.1)
+    times = []
+    for i in range(repeat):
+        changed.clear()
+        start = time.perf_counter()
+        with open(path, "a") as f:
+            f.write(f"{i}\n")
+        changed.wait(5)
+        times.append((time.perf_counter() - start) * 1000)
+    watcher.stop()
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k")
+    parser.add_argument("--changes", type=int, default=10, help="entries the other process adds per round")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'apply ms/op':>12} {'refresh ms':>11} {'full reload ms':>15}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size + args.changes * args.repeat)
+        base, extra = entries[:size], entries[size:]
+        with tempfile.TemporaryDirectory() as tmp:
+            refresh, reload_, apply_ = refresh_vs_reload(
+                os.path.join(tmp, "vault.json"), base, extra, args.changes, args.repeat)
+        print(f"{size:>10} {apply_:>12.3f} {refresh:>11.3f} {reload_:>15.1f}")
+
+    print()
+    watchers = [("polling", vault_watch.PollingWatcher)]
+    if sys.platform.startswith("linux"):
+        watchers.insert(0, ("inotify", vault_watch.InotifyWatcher))
+    for name, factory in watchers:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{name:>10} notices a write after {watcher_latency_ms(factory, tmp, args.repeat):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
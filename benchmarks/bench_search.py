@@ -0,0 +1,60 @@
+"""Time Saved tab searches with SearchIndex against a full substring scan.
+
+    python benchmarks/bench_search.py --sizes 1k,100k
+"""
+import argparse
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_index import SearchIndex
+
+
+def scan(entries, term):
+    """The pre-index filter: lowercase and test every record"""
+    return [e for e in entries
+            if term in e["website"].lower() or term in e["username"].lower()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k")
+    parser.add_argument("--query", default="user42")
+    args = parser.parse_args()
+
+    # Simulate typing the query one character at a time
+    keystrokes = [args.query[:i] for i in range(1, len(args.query) + 1)]
+    print(f"{'entries':>10} {'build s':>9} {'typed scan ms':>14} {'typed index ms':>15} "
+          f"{'cold scan ms':>13} {'cold index ms':>14}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size)
+        start = time.perf_counter()
+        index = SearchIndex(entries)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for term in keystrokes:
+            expected = scan(entries, term)
+        scan_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for term in keystrokes:
+            found = index.search(term)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        assert found == expected
+
+        # A pasted query with no previous result set to refine
+        index = SearchIndex(entries)
+        start = time.perf_counter()
+        scan(entries, args.query)
+        cold_scan_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        index.search(args.query)
+        cold_index_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{size:>10} {build:>9.2f} {scan_ms:>14.2f} {index_ms:>15.2f} "
+              f"{cold_scan_ms:>13.2f} {cold_index_ms:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Saved tab sorting: building a column order once, then switching orders and keeping them current.
+
+"resort" is what sorting without SortIndex costs on every heading click: a
+full sort of the vault with its keys recomputed. "switch" is a click once
+the column's order exists. "add batch" is --ops new entries (an import
+batch) merged into the order the next time it is drawn.
+
+    python benchmarks/bench_sort.py --sizes 1k,10k,100k
+"""
+import argparse
+import statistics
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_index import SORT_KEYS, PasswordIndex, SortIndex, sort_key
+from vault_records import Record
+
+
+def timed_ms(func, repeat=1):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--ops", type=int, default=1000, help="entries added as one batch, then deleted, per size")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'column':<11} {'build ms':>9} {'switch ms':>10} {'resort ms':>10} "
+          f"{'add batch ms':>13} {'delete us':>10}")
+    for size in parse_sizes(args.sizes):
+        entries = [Record.from_dict(entry) for entry in make_entries(size + args.ops)]
+        base, extra = entries[:size], entries[size:]
+        for column in SORT_KEYS:
+            index = PasswordIndex(base)
+            sort_index = SortIndex(index)
+            build = timed_ms(lambda: sort_index.order(column))
+            switch = timed_ms(lambda: sort_index.sort(index, column, descending=True), args.repeat)
+            resort = timed_ms(lambda: sorted(index, key=lambda entry: sort_key(column, entry), reverse=True),
+                              args.repeat)
+
+            start = time.perf_counter()
+            for entry in extra:
+                index.add(entry)
+            sort_index.add(extra)
+            sort_index.order(column)
+            add = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for entry in extra:
+                index.remove(entry["website"], entry["username"])
+                sort_index.remove(entry)
+            delete = (time.perf_counter() - start) / args.ops * 1e6
+            print(f"{size:>10} {column:<11} {build:>9.1f} {switch:>10.2f} {resort:>10.1f} "
+                  f"{add:>13.1f} {delete:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
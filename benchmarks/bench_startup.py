@@ -0,0 +1,106 @@
+"""Cold start: module import time and time-to-first-window, with a target check.
+
+The window timings need a display (use xvfb-run on a headless machine);
+without one only the import is measured. --check exits with status 1 when
+a measurement misses its target, so it can guard startup in CI:
+
+    python benchmarks/bench_startup.py --sizes 1k,100k
+    python benchmarks/bench_startup.py --check
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import ROOT, make_entries, parse_sizes
+
+# Startup targets in ms. The window must appear within the target whatever
+# the vault size, since loading happens in the background after it shows.
+IMPORT_TARGET_MS = 150
+FIRST_WINDOW_TARGET_MS = 500
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import password_generator
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def measure_import(repeat):
+    """Median ms to import the app in a fresh interpreter"""
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        times.append(float(out))
+    return statistics.median(times)
+
+
+def measure(async_load):
+    """Seconds until the first window is drawn, and until the vault is fully loaded"""
+    import tkinter as tk
+    from password_generator import PasswordGenerator
+
+    start = time.perf_counter()
+    root = tk.Tk()
+    app = PasswordGenerator(root, async_load=async_load)
+    root.update()
+    first_window = time.perf_counter() - start
+    while app.loading:
+        root.update()
+    loaded = time.perf_counter() - start
+    app.on_close()
+    return first_window, loaded
+
+
+def has_display():
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,100k")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters for the import timing")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 if a startup target is missed")
+    args = parser.parse_args()
+
+    missed = []
+    import_ms = measure_import(args.repeat)
+    print(f"import password_generator: {import_ms:.1f} ms (target {IMPORT_TARGET_MS} ms)")
+    if import_ms > IMPORT_TARGET_MS:
+        missed.append("import")
+
+    if not has_display():
+        print("no display, skipping the window timings")
+    else:
+        print(f"{'entries':>10} {'mode':>6} {'first window s':>15} {'fully loaded s':>15}")
+        for size in parse_sizes(args.sizes):
+            with tempfile.TemporaryDirectory() as home:
+                # The app keeps its vault in ~/Documents
+                os.environ["HOME"] = home
+                os.makedirs(os.path.join(home, "Documents"))
+                with open(os.path.join(home, "Documents", "password_vault.json"), "w") as f:
+                    json.dump({"websites": make_entries(size)}, f)
+                for mode, async_load in (("sync", False), ("async", True)):
+                    first_window, loaded = measure(async_load)
+                    print(f"{size:>10} {mode:>6} {first_window:>15.3f} {loaded:>15.3f}")
+                    if async_load and first_window * 1000 > FIRST_WINDOW_TARGET_MS:
+                        missed.append(f"first window at {size:,} entries")
+
+    if args.check and missed:
+        print("missed startup target: " + ", ".join(missed), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time one add against the old full-file rewrite and the journal storage.
+
+    python benchmarks/bench_storage.py --sizes 1k,10k,100k
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from synthetic import make_entries, parse_sizes
+from vault_storage import JournalStorage
+
+
+def rewrite_ms(path, entries, extra, ops):
+    """The pre-journal save_data: dump the whole vault on every mutation"""
+    start = time.perf_counter()
+    for entry in extra[:ops]:
+        entries.append(entry)
+        with open(path, "w") as f:
+            json.dump({"websites": entries}, f, indent=2)
+    return (time.perf_counter() - start) / ops * 1000
+
+
+def journal_ms(path, entries, extra, ops):
+    """Journal appends, without letting a compaction start mid-measurement"""
+    storage = JournalStorage(path, compact_bytes=float("inf"))
+    with open(path, "w") as f:
+        json.dump({"websites": entries}, f)
+    storage.load()
+    start = time.perf_counter()
+    for entry in extra[:ops]:
+        storage.apply([("add", entry)])
+    elapsed = time.perf_counter() - start
+    storage.close()
+    return elapsed / ops * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k")
+    parser.add_argument("--ops", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} {'rewrite ms/op':>14} {'journal ms/op':>14}")
+    for size in parse_sizes(args.sizes):
+        entries = make_entries(size + args.ops)
+        base, extra = entries[:size], entries[size:]
+        with tempfile.TemporaryDirectory() as tmp:
+            rewrite = rewrite_ms(os.path.join(tmp, "rewrite.json"), list(base), extra, args.ops)
+            journal = journal_ms(os.path.join(tmp, "journal.json"), list(base), extra, args.ops)
+        print(f"{size:>10} {rewrite:>14.2f} {journal:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Passphrase wordlist: parsing the text list vs mapping the binary one, and generation speed.
+
+    python benchmarks/bench_wordlist.py --words 7776,1m
+"""
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+
+from synthetic import parse_sizes
+import password_core
+import vault_wordlist
+
+
+def write_text_list(path, count, seed=1234):
+    """EFF-style 'index<TAB>word' lines of distinct synthetic words"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(count):
+            word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+            f.write(f"{i:07d}\t{word}{i}\n")
+
+
+def ms(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", default="7776,1m", help="wordlist sizes")
+    parser.add_argument("--count", type=int, default=100000, help="passphrases generated per timing")
+    args = parser.parse_args()
+
+    print(f"{'words':>10} {'parse text ms':>14} {'open mmap ms':>13} {'pick us':>8} "
+          f"{'one-by-one/s':>13} {'batch/s':>10}")
+    for size in parse_sizes(args.words):
+        with tempfile.TemporaryDirectory() as tmp:
+            text_path = os.path.join(tmp, "words.txt")
+            bin_path = os.path.join(tmp, "words.bin")
+            write_text_list(text_path, size)
+            vault_wordlist.convert_wordlist(text_path, bin_path)
+
+            def parse_text():
+                with open(text_path) as f:
+                    return list(vault_wordlist._parse_words(f))
+
+            parse, _ = ms(parse_text)
+            open_, wordlist = ms(lambda: vault_wordlist.Wordlist(bin_path))
+            picks = [random.randrange(size) for _ in range(100000)]
+            pick, _ = ms(lambda: [wordlist[i] for i in picks])
+            single, _ = ms(lambda: [password_core.generate_passphrase(wordlist) for _ in range(args.count // 10)])
+            batch, _ = ms(lambda: password_core.generate_passphrase_batch(args.count, wordlist))
+            wordlist.close()
+        print(f"{size:>10} {parse:>14.1f} {open_:>13.3f} {pick * 1000 / len(picks):>8.2f} "
+              f"{args.count // 10 / single * 1000:>13,.0f} {args.count / batch * 1000:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Time load, save, search, generate and render on synthetic vaults, with a baseline check.
+
+Every operation runs against vaults of each size and is reported as the
+median of --repeat runs in milliseconds. Results are written as JSON and
+compared with a stored baseline; anything slower than the baseline by more
+than --tolerance makes the script exit with status 1.
+
+    python benchmarks/suite.py --sizes 1k,10k,100k --output benchmarks/baseline.json
+    python benchmarks/suite.py --sizes 1k,10k,100k      # compares with benchmarks/baseline.json
+
+The app's own methods (load_data, save_data, filter_passwords,
+load_saved_passwords, generate_password) run under a withdrawn Tk root when
+a display is available (xvfb-run works); otherwise only the Tk-free cases
+underneath them are timed.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from synthetic import make_entries, parse_sizes
+import password_core
+from vault_index import PasswordIndex, SearchIndex
+from vault_storage import JournalStorage
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Differences below this many ms are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+def median_ms(func, repeat, setup=None):
+    """Median wall time of func over repeat runs; setup runs untimed before each"""
+    times = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def write_vault(path, entries):
+    with open(path, "w") as f:
+        json.dump({"websites": entries}, f, indent=2)
+
+
+def core_cases(path, extra, query, repeat):
+    """The Tk-free operations under each app method"""
+    results = {}
+    results["storage.load"] = median_ms(lambda: JournalStorage(path).load(), repeat)
+
+    entries = JournalStorage(path).load()["websites"]
+    results["index.build"] = median_ms(lambda: PasswordIndex(entries), repeat)
+
+    # One durable add, journal-style; compaction is held off so every run measures the same thing
+    storage = JournalStorage(path, compact_bytes=float("inf"))
+    storage.load()
+    adds = iter(extra)
+    results["storage.apply"] = median_ms(lambda: storage.apply([("add", next(adds))]), repeat)
+    storage.close()
+
+    search_index = SearchIndex(entries)
+    # Reset the last query before each run so it's a cold search, not a refinement
+    results["search_index.search"] = median_ms(
+        lambda: search_index.search(query), repeat,
+        setup=lambda i: search_index.search(""))
+
+    results["password_core.generate_password"] = median_ms(
+        lambda: password_core.generate_password(password_core.DEFAULT_LENGTH, password_core.FORM_CHARSET), repeat)
+    return results
+
+
+def tk_cases(root, extra, query, repeat):
+    """The app's own methods, run against the vault in $HOME/Documents"""
+    from password_generator import PasswordGenerator
+
+    import tkinter as tk
+
+    results = {}
+    holder = []
+    # on_close destroys the window it was given, so each size gets its own hidden one
+    window = tk.Toplevel(root)
+    window.withdraw()
+
+    def render(func):
+        def run():
+            func()
+            root.update_idletasks()
+        return run
+
+    def startup():
+        holder.append(PasswordGenerator(window, async_load=False))
+        root.update_idletasks()
+
+    # A full construction per size is enough; it dominates everything else
+    results["startup"] = median_ms(startup, 1)
+    app = holder[0]
+    # Tabs are built on first selection; the Saved tab is where the vault gets drawn
+    results["build_saved_tab"] = median_ms(render(lambda: app.build_tab(app.saved_frame)), 1)
+
+    results["load_data"] = median_ms(app.load_data, repeat)
+
+    adds = iter(extra)
+    results["save_data"] = median_ms(lambda: app.save_data(("add", next(adds))), repeat)
+    app.writer.flush()
+
+    def set_query(i):
+        # Run the search directly rather than through the debounce timer
+        app.search_var.set(query)
+        if app._search_after_id is not None:
+            root.after_cancel(app._search_after_id)
+
+    results["filter_passwords"] = median_ms(render(app.filter_passwords), repeat, setup=set_query)
+    app.search_var.set("")
+    results["load_saved_passwords"] = median_ms(render(app.load_saved_passwords), repeat)
+    results["generate_password"] = median_ms(app.generate_password, repeat)
+    app.on_close()
+    return results
+
+
+def open_hidden_root():
+    """A withdrawn Tk root, or None without a display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    return root
+
+
+def compare(results, baseline, tolerance):
+    """Print a comparison table and return the (size, case) pairs that regressed"""
+    regressions = []
+    print(f"\n{'entries':>10} {'case':<34} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for size, cases in results.items():
+        for case, now in cases.items():
+            before = baseline.get(size, {}).get(case)
+            if before is None:
+                continue
+            change = (now - before) / before if before else 0.0
+            regressed = change > tolerance and now - before > NOISE_FLOOR_MS
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{size:>10} {case:<34} {before:>12.3f} {now:>10.3f} {change:>+8.0%}{flag}")
+            if regressed:
+                regressions.append((size, case))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k", help="vault sizes, up to e.g. 1m")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query", default="user42")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="results to compare with (default: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--no-tk", action="store_true", help="skip the app methods even if a display is available")
+    args = parser.parse_args()
+
+    root = None if args.no_tk else open_hidden_root()
+    results = {}
+    with tempfile.TemporaryDirectory() as home:
+        # The app keeps its vault in ~/Documents; keep a real breach database out of the timings
+        os.environ["HOME"] = home
+        os.environ.pop("PASSWORD_VAULT_BREACH_DB", None)
+        documents = os.path.join(home, "Documents")
+        os.makedirs(documents)
+        path = os.path.join(documents, "password_vault.json")
+
+        for size in parse_sizes(args.sizes):
+            entries = make_entries(size + 2 * args.repeat)
+            base, extra = entries[:size], entries[size:]
+            write_vault(path, base)
+            cases = core_cases(path, extra[:args.repeat], args.query, args.repeat)
+            if root is not None:
+                # Drop the core cases' journal so the app starts from the same vault
+                write_vault(path, base)
+                journal = os.path.splitext(path)[0] + ".journal"
+                if os.path.exists(journal):
+                    os.remove(journal)
+                cases.update(tk_cases(root, extra[args.repeat:], args.query, args.repeat))
+            results[str(size)] = cases
+            for case, ms in cases.items():
+                print(f"{size:>10} {case:<34} {ms:>10.3f} ms")
+
+    if root is not None:
+        root.destroy()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tk": root is not None,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.output != args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
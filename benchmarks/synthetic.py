@@ -0,0 +1,40 @@
+"""Synthetic vault data shared by the benchmark scripts."""
+import os
+import random
+import string
+import sys
+
+# Let the benchmarks import the app modules when run from anywhere
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TLDS = ["com", "org", "net", "io", "co.uk", "dev", "app"]
+
+
+def make_entry(i, rng):
+    """Build one entry in the password_vault.json schema"""
+    name = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+    return {
+        "website": f"{name}{i}.{rng.choice(TLDS)}",
+        "username": f"user{i}@{name}.com",
+        "password": "".join(rng.choice(string.ascii_letters + string.digits) for _ in range(16)),
+        "date_added": f"20{rng.randint(18, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} "
+                      f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+    }
+
+
+def make_entries(count, seed=1234):
+    """Deterministic list of synthetic entries"""
+    rng = random.Random(seed)
+    return [make_entry(i, rng) for i in range(count)]
+
+
+def parse_sizes(text):
+    """Parse a comma separated size list such as '1k,100k,1m'"""
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        scale = {"k": 1_000, "m": 1_000_000}.get(part[-1:], 1)
+        sizes.append(int(part.rstrip("km")) * scale)
+    return sizes
@@ -0,0 +1,256 @@
+import hashlib
+import math
+import os
+import secrets
+import shutil
+import string
+from array import array
+
+SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+# The Add New tab sticks to symbols most websites accept
+FORM_SYMBOLS = "!@#$%^&*"
+FORM_CHARSET = string.ascii_letters + string.digits + FORM_SYMBOLS
+
+MIN_LENGTH = 8
+MAX_LENGTH = 50
+DEFAULT_LENGTH = 16
+
+# Passwords produced per call to generate_batch when streaming
+DEFAULT_BATCH_SIZE = 10000
+
+# Passphrases: words drawn from a diceware list (see vault_wordlist)
+MIN_WORDS = 3
+MAX_WORDS = 20
+DEFAULT_WORDS = 6
+DEFAULT_SEPARATOR = "-"
+# How each word of a passphrase is capitalized
+CAPITALIZATIONS = {"lower": str.lower, "title": str.capitalize, "upper": str.upper}
+
+
+def build_charset(uppercase=True, lowercase=True, numbers=True, symbols=True):
+    """Characters to draw from for the selected character types"""
+    chars = ""
+    if uppercase:
+        chars += string.ascii_uppercase
+    if lowercase:
+        chars += string.ascii_lowercase
+    if numbers:
+        chars += string.digits
+    if symbols:
+        chars += SYMBOLS
+    return chars
+
+
+def _check(length, chars):
+    if not chars:
+        raise ValueError("Please select at least one character type!")
+    if not MIN_LENGTH <= length <= MAX_LENGTH:
+        raise ValueError(f"Password length must be between {MIN_LENGTH} and {MAX_LENGTH}!")
+
+
+def generate_password(length=DEFAULT_LENGTH, chars=None):
+    """One password drawn from chars with the OS CSPRNG"""
+    chars = build_charset() if chars is None else chars
+    _check(length, chars)
+    return "".join(secrets.choice(chars) for _ in range(length))
+
+
+def _translation(chars):
+    """Byte table mapping random bytes onto chars, plus the bytes to reject
+
+    Bytes at or above the largest multiple of len(chars) are rejected so that
+    every character is equally likely.
+    """
+    limit = 256 - 256 % len(chars)
+    table = bytes(ord(chars[b % len(chars)]) for b in range(256))
+    rejected = bytes(range(limit, 256))
+    return table, rejected, limit
+
+
+def generate_batch(count, length=DEFAULT_LENGTH, chars=None):
+    """count passwords, drawing random bytes in bulk with rejection sampling"""
+    chars = build_charset() if chars is None else chars
+    _check(length, chars)
+    if not chars.isascii():
+        raise ValueError("Bulk generation needs an ASCII character set")
+    table, rejected, limit = _translation(chars)
+    needed = count * length
+    out = bytearray()
+    while len(out) < needed:
+        # Over-draw by the expected rejection rate so one round is usually enough
+        raw = secrets.token_bytes((needed - len(out)) * 256 // limit + 64)
+        out += raw.translate(table, rejected)
+    text = out[:needed].decode("ascii")
+    return [text[i:i + length] for i in range(0, needed, length)]
+
+
+def entropy_bits(symbols, choices):
+    """Entropy of symbols picked uniformly and independently from choices options"""
+    return symbols * math.log2(choices) if choices > 1 else 0.0
+
+
+def _check_passphrase(wordlist, words, capitalize):
+    if not len(wordlist):
+        raise ValueError("The wordlist is empty!")
+    if not MIN_WORDS <= words <= MAX_WORDS:
+        raise ValueError(f"Passphrases need between {MIN_WORDS} and {MAX_WORDS} words!")
+    if capitalize not in CAPITALIZATIONS:
+        raise ValueError(f"Capitalization must be one of: {', '.join(CAPITALIZATIONS)}")
+
+
+def generate_passphrase(wordlist, words=DEFAULT_WORDS, separator=DEFAULT_SEPARATOR, capitalize="lower"):
+    """One passphrase of words picked from wordlist with the OS CSPRNG"""
+    _check_passphrase(wordlist, words, capitalize)
+    case = CAPITALIZATIONS[capitalize]
+    n = len(wordlist)
+    return separator.join(case(wordlist[secrets.randbelow(n)]) for _ in range(words))
+
+
+def _random_indices(count, n):
+    """count uniform ints below n from bulk random bytes, with rejection sampling"""
+    span = 1 << (8 * array("I").itemsize)
+    limit = span - span % n
+    out = []
+    while len(out) < count:
+        # Over-draw by the expected rejection rate so one round is usually enough
+        needed = count - len(out)
+        raw = array("I", secrets.token_bytes((needed * span // limit + 16) * array("I").itemsize))
+        out.extend(value % n for value in raw if value < limit)
+    return out[:count]
+
+
+def generate_passphrase_batch(count, wordlist, words=DEFAULT_WORDS, separator=DEFAULT_SEPARATOR,
+                              capitalize="lower"):
+    """count passphrases, drawing the random word indices in bulk"""
+    _check_passphrase(wordlist, words, capitalize)
+    case = CAPITALIZATIONS[capitalize]
+    indices = _random_indices(count * words, len(wordlist))
+    # Decode each distinct word once per batch
+    cache = {}
+    picked = []
+    for i in indices:
+        word = cache.get(i)
+        if word is None:
+            word = cache[i] = case(wordlist[i])
+        picked.append(word)
+    return [separator.join(picked[i:i + words]) for i in range(0, len(picked), words)]
+
+
+def _digest(password):
+    """Fixed-size fingerprint used to spot repeated passwords"""
+    return hashlib.blake2b(password.encode(), digest_size=16).digest()
+
+
+def _check_unique(count, length, chars):
+    chars = build_charset() if chars is None else chars
+    if len(set(chars)) ** length < count:
+        raise ValueError(f"Only {len(set(chars)) ** length} distinct passwords exist for these options")
+
+
+def iter_batches(count, length=DEFAULT_LENGTH, chars=None, batch_size=DEFAULT_BATCH_SIZE,
+                 unique=False, seen=None):
+    """Yield lists of passwords until count have been produced
+
+    With unique=True repeats are dropped and replaced, using seen (a set of
+    digests) to remember what has already been handed out.
+    """
+    if unique:
+        _check_unique(count, length, chars)
+    return _iter_batches(lambda n: generate_batch(n, length, chars), count, batch_size, unique, seen)
+
+
+def iter_passphrase_batches(count, wordlist, words=DEFAULT_WORDS, separator=DEFAULT_SEPARATOR,
+                            capitalize="lower", batch_size=DEFAULT_BATCH_SIZE, unique=False, seen=None):
+    """iter_batches for passphrases"""
+    if unique and len(wordlist) ** words < count:
+        raise ValueError(f"Only {len(wordlist) ** words} distinct passphrases exist for these options")
+    return _iter_batches(lambda n: generate_passphrase_batch(n, wordlist, words, separator, capitalize),
+                         count, batch_size, unique, seen)
+
+
+def _iter_batches(generate, count, batch_size, unique, seen):
+    if unique:
+        seen = set() if seen is None else seen
+    while count > 0:
+        batch = generate(min(batch_size, count))
+        if unique:
+            fresh = []
+            for password in batch:
+                digest = _digest(password)
+                if digest not in seen:
+                    seen.add(digest)
+                    fresh.append(password)
+            batch = fresh
+        if batch:
+            yield batch
+        count -= len(batch)
+
+
+def _write_shard(path, count, length, chars, batch_size, unique):
+    """Worker process body: write count passwords to one shard file"""
+    with open(path, "w") as f:
+        for batch in iter_batches(count, length, chars, batch_size, unique):
+            f.write("\n".join(batch) + "\n")
+    return path
+
+
+def _dedupe_shards(paths, length, chars, batch_size):
+    """Drop passwords repeated across shards and top the last shard back up"""
+    seen = set()
+    missing = 0
+    for path in paths:
+        kept = []
+        dropped = 0
+        with open(path) as f:
+            for line in f:
+                digest = _digest(line.rstrip("\n"))
+                if digest in seen:
+                    dropped += 1
+                else:
+                    seen.add(digest)
+                    kept.append(line)
+        if dropped:
+            with open(path + ".tmp", "w") as f:
+                f.writelines(kept)
+            os.replace(path + ".tmp", path)
+            missing += dropped
+    if missing:
+        with open(paths[-1], "a") as f:
+            for batch in iter_batches(missing, length, chars, batch_size, unique=True, seen=seen):
+                f.write("\n".join(batch) + "\n")
+
+
+def generate_sharded(count, shard_dir, length=DEFAULT_LENGTH, chars=None, workers=None,
+                     merge_to=None, unique=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Generate count passwords across a process pool, one shard file per worker
+
+    Each worker draws from os.urandom through secrets, so the processes get
+    independent entropy straight from the OS rather than a forked PRNG
+    state. With unique=True every password in the whole batch is distinct;
+    this keeps one 16-byte digest per password in memory. Returns the shard
+    paths; merge_to additionally concatenates them into one file.
+    """
+    chars = build_charset() if chars is None else chars
+    _check(length, chars)
+    if unique:
+        _check_unique(count, length, chars)
+    workers = max(1, min(workers or os.cpu_count() or 1, count or 1))
+    os.makedirs(shard_dir, exist_ok=True)
+
+    counts = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+    paths = [os.path.join(shard_dir, f"passwords-{i:03d}.txt") for i in range(workers)]
+    # multiprocessing is slow to import and only needed here, not by the GUI
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as pool:
+        list(pool.map(_write_shard, paths, counts, [length] * workers, [chars] * workers,
+                      [batch_size] * workers, [unique] * workers))
+
+    if unique and workers > 1:
+        _dedupe_shards(paths, length, chars, batch_size)
+    if merge_to:
+        with open(merge_to, "wb") as out:
+            for path in paths:
+                with open(path, "rb") as shard:
+                    shutil.copyfileobj(shard, out)
+    return paths
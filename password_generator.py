@@ -1,14 +1,49 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
-import random
-import string
-import os
+from tkinter import ttk, messagebox, simpledialog, filedialog
+import queue
+import threading
 from datetime import datetime
-import webbrowser
+
+import password_core
+from vault_audit import VaultAuditor, summarize
+from vault_breach import MAX_REGENERATE, open_breach_checker
+from vault_crypto import VaultCipher, key_file_for, masked
+import vault_diagnostics
+from vault_diagnostics import StallDetector, metrics
+from vault_history import HistoryStore, history_file_for
+from vault_index import DomainIndex, PasswordIndex, SearchIndex, SortIndex, is_url_query, matches, sorted_position
+from vault_records import Record
+from vault_storage import BackgroundWriter, default_data_file, open_storage
+import vault_watch
+from vault_widgets import VirtualTreeview
+from vault_wordlist import default_wordlist_file, open_wordlist
+
+# Delay between the last keystroke and running the Saved tab search
+SEARCH_DEBOUNCE_MS = 150
+
+# Startup loading: how often to check the loader thread, and entries per UI batch
+LOAD_POLL_MS = 50
+LOAD_BATCH_SIZE = 2000
+
+# How often to check the background writer for failed saves
+WRITE_ERROR_POLL_MS = 500
+
+# How often to drop an idle master-password key from memory
+KEY_CHECK_MS = 10000
+
+# Saved tab headings that sort when clicked, and the SortIndex column for each
+SORT_COLUMNS = {"Website": "website", "Username": "username", "Date Added": "date_added"}
+
+# How often to check for entries other windows or scripts saved
+EXTERNAL_CHANGE_POLL_MS = 250
+# Patching the Saved tab row by row may scan every row per change; past this many
+# (changes x rows) comparisons, about 0.1 s, a merge redraws the list instead
+MERGE_SCAN_BUDGET = 1000000
 
 class PasswordGenerator:
-    def __init__(self, root):
+    def __init__(self, root, async_load=True):
+        # Started first so a profile covers startup too
+        self.profiler = vault_diagnostics.start_profiler()
         self.root = root
         self.root.title("✨ Password Vault ✨")
         self.root.geometry("800x600")
@@ -27,32 +62,265 @@ class PasswordGenerator:
         }
         
         # Data storage - Use user's documents folder instead of OneDrive
-        import os
-        documents_path = os.path.expanduser("~/Documents")
-        self.data_file = os.path.join(documents_path, "password_vault.json")
-        self.passwords_data = self.load_data()
+        self.data_file = default_data_file()
+        self.storage = open_storage(self.data_file)
+        self.writer = BackgroundWriter(self.storage)
+        self.cipher = VaultCipher(key_file_for(self.data_file))
+        # Old passwords live in their own file, read only when History is opened
+        self.history = HistoryStore(history_file_for(self.data_file))
+        # Opening only maps the file; pages are read as lookups touch them
+        try:
+            self.breach_checker = open_breach_checker()
+        except ValueError:
+            self.breach_checker = None
+        self.auditor = VaultAuditor(self.cipher.reveal, self.breach_checker)
+        # The passphrase wordlist is mapped the first time a passphrase is generated
+        self.wordlist = None
+        self.index = PasswordIndex()
+        # Backends that search themselves don't need the in-memory trigram index
+        self.search_index = None if self.storage.supports_search else SearchIndex()
+        # URL lookups for pasted addresses; no backend does these itself
+        self.domain_index = DomainIndex()
+        # Column orders for the Saved tab, built the first time a heading is clicked
+        self.sort_index = SortIndex(self.index)
+        self.sort_column = None
+        self.sort_descending = False
+        self._search_after_id = None
+        self.loading = True
+        # Changes other processes saved, filled by the watcher thread
+        self.external_changes = queue.Queue()
+        watch_paths = self.storage.watch_paths()
+        self.watcher = vault_watch.watch(watch_paths, self.on_external_change) if watch_paths else None
         
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(WRITE_ERROR_POLL_MS, self.poll_write_errors)
+        self.root.after(KEY_CHECK_MS, self.expire_key)
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self.poll_external_changes)
+        self.stall_detector = StallDetector(self.root)
+        self.stall_detector.start()
+        # The diagnostics tab stays hidden until asked for
+        self.diagnostics_frame = None
+        self.root.bind("<Control-Shift-D>", self.toggle_diagnostics)
+        
+        if async_load:
+            self.start_loading()
+        else:
+            self.add_loaded_entries(self.load_data()["websites"])
+            self.finish_loading()
         
+    @metrics.timed("load_data")
     def load_data(self):
-        """Load existing password data from JSON file"""
-        if os.path.exists(self.data_file):
+        """Load existing password data from the vault snapshot and journal"""
+        try:
+            return self.storage.load()
+        except OSError:
+            return {"websites": []}
+    
+    def run_in_background(self, func, on_done):
+        """Run func on a worker thread and pass its result (or exception) to on_done on the Tk thread"""
+        results = queue.Queue()
+        
+        def worker():
+            try:
+                results.put(func())
+            except Exception as e:
+                results.put(e)
+        
+        def poll():
             try:
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return {"websites": []}
-        return {"websites": []}
-    
-    def save_data(self):
-        """Save password data to JSON file"""
+                result = results.get_nowait()
+            except queue.Empty:
+                self.root.after(LOAD_POLL_MS, poll)
+                return
+            on_done(result)
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(LOAD_POLL_MS, poll)
+    
+    def start_loading(self):
+        """Read and parse the vault on a worker thread so the window shows right away"""
+        self.run_in_background(self.load_data, self.on_data_loaded)
+    
+    def on_data_loaded(self, result):
+        """Fill the Saved tab in batches once the loader thread is done"""
+        if isinstance(result, Exception):
+            messagebox.showerror("Error", f"Could not load data: {str(result)}")
+            self.finish_loading()
+            return
+        
+        self.load_batch(result["websites"], 0)
+    
+    def load_batch(self, entries, start):
+        """Index and display one batch of loaded entries, then yield to the event loop"""
+        end = start + LOAD_BATCH_SIZE
+        self.add_loaded_entries(entries[start:end])
+        if self.saved_view is not None:
+            self.load_progress.stop()
+            self.load_progress.configure(mode="determinate", maximum=max(len(entries), 1), value=min(end, len(entries)))
+            self.load_status.configure(text=f"Loading vault... {min(end, len(entries)):,} / {len(entries):,}")
+        if end < len(entries):
+            self.root.after(1, self.load_batch, entries, end)
+        else:
+            self.finish_loading()
+    
+    def add_loaded_entries(self, entries):
+        """Add entries read from storage to the indexes and the Saved tab"""
+        added = [entry for entry in entries if self.index.add(entry)]
+        self.index_for_search(added)
+        if self.saved_view is not None and not self.search_var.get() and self.sort_column is None:
+            self.saved_view.append_rows(added)
+    
+    def index_for_search(self, entries):
+        """Add entries to the search, URL and sort indexes"""
+        for entry in entries:
+            if self.search_index is not None:
+                self.search_index.add(entry)
+            self.domain_index.add(entry)
+        self.sort_index.add(entries)
+    
+    def forget_entry(self, website, username):
+        """Remove an entry from every index, returning it (or None if there was none)"""
+        entry = self.index.remove(website, username)
+        if entry is not None:
+            if self.search_index is not None:
+                self.search_index.remove(entry)
+            self.domain_index.remove(entry)
+            self.sort_index.remove(entry)
+        return entry
+    
+    def finish_loading(self):
+        """Start pruning history and hide the progress indicator once the whole vault is in memory"""
+        self.loading = False
+        self.history.start_pruning()
+        if self.saved_view is None:
+            return
+        self.hide_progress()
+        # A search or sort chosen while loading only covered part of the vault
+        if self.search_var.get() or self.sort_column is not None:
+            self.filter_passwords()
+    
+    def show_progress(self, text):
+        """Show the Saved tab status line and an indeterminate progress bar"""
+        self.load_status.configure(text=text)
+        self.load_status.pack(anchor="w", padx=20, before=self.saved_tree_frame)
+        self.load_progress.configure(mode="indeterminate")
+        self.load_progress.pack(fill="x", padx=20, before=self.saved_tree_frame)
+        self.load_progress.start(10)
+    
+    def hide_progress(self):
+        """Hide the Saved tab status line and progress bar"""
+        self.load_progress.stop()
+        self.load_progress.pack_forget()
+        self.load_status.pack_forget()
+    
+    @metrics.timed("save_data")
+    def save_data(self, *mutations):
+        """Queue ("add"/"delete", entry) mutations for the background writer"""
+        self.writer.submit(*mutations)
+    
+    def poll_write_errors(self):
+        """Report saves that failed on the writer thread, and failed compactions and history prunes"""
         try:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-            with open(self.data_file, 'w') as f:
-                json.dump(self.passwords_data, f, indent=2)
-        except Exception as e:
+            e = self.writer.errors.get_nowait()
+        except queue.Empty:
+            pass
+        else:
             messagebox.showerror("Error", f"Could not save data: {str(e)}\n\nTry running the app as administrator or check OneDrive settings.")
+        e = self.storage.compaction_error
+        if e is not None:
+            # Reported once; the next compaction retries and clears it on success
+            self.storage.compaction_error = None
+            messagebox.showerror("Error", f"Could not compact the vault journal: {str(e)}\n\nNothing was lost; it will be retried.")
+        e = self.history.prune_error
+        if e is not None:
+            self.history.prune_error = None
+            messagebox.showerror("Error", f"Could not prune the password history: {str(e)}\n\nNothing was lost; it will be retried.")
+        self.root.after(WRITE_ERROR_POLL_MS, self.poll_write_errors)
+    
+    def on_external_change(self):
+        """Watcher thread: collect what changed on disk for the Tk thread to merge"""
+        try:
+            changes = self.storage.refresh()
+        except OSError:
+            return
+        if changes:
+            self.external_changes.put(changes)
+    
+    def poll_external_changes(self):
+        """Merge changes other processes saved, once the vault has finished loading"""
+        changes = []
+        while not self.loading:
+            try:
+                changes.extend(self.external_changes.get_nowait())
+            except queue.Empty:
+                break
+        if changes:
+            self.merge_external_changes(changes)
+        self.root.after(EXTERNAL_CHANGE_POLL_MS, self.poll_external_changes)
+    
+    @metrics.timed("merge_external_changes")
+    def merge_external_changes(self, changes):
+        """Apply another process's mutations to the indexes and the Saved tab, row by row"""
+        metrics.incr("vault.external_changes", len(changes))
+        search_term = self.search_var.get()
+        # Redraw when patching could scan too many rows (or for URL results, ordered by match)
+        redraw = self.saved_view is not None and (
+            len(changes) * len(self.saved_view.rows) > MERGE_SCAN_BUDGET or is_url_query(search_term))
+        view = None if redraw else self.saved_view
+        for op, entry in changes:
+            existing = self.forget_entry(entry.website, entry.username)
+            if existing is not None and view is not None:
+                view.remove_row(existing)
+            if op == "add":
+                self.index.add(entry)
+                self.index_for_search([entry])
+                if view is not None and matches(entry, search_term.lower()):
+                    self.show_entry(entry)
+        if redraw:
+            self.filter_passwords()
+    
+    def expire_key(self):
+        """Forget the master-password key once it has been idle too long"""
+        self.cipher.is_unlocked()
+        self.root.after(KEY_CHECK_MS, self.expire_key)
+    
+    def ensure_unlocked(self):
+        """Ask for the master password if the vault is encrypted and locked"""
+        if not self.cipher.enabled() or self.cipher.is_unlocked():
+            return True
+        while True:
+            master_password = simpledialog.askstring("🔐 Unlock", "Master password:", show="*", parent=self.root)
+            if master_password is None:
+                return False
+            try:
+                self.cipher.unlock(master_password)
+                return True
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+            except RuntimeError as e:
+                messagebox.showerror("Error", str(e))
+                return False
+    
+    def reveal_password(self, entry):
+        """Decrypt one entry's password, or None if the user didn't unlock"""
+        if not self.ensure_unlocked():
+            return None
+        return self.cipher.reveal(entry)
+    
+    def on_close(self):
+        """Flush pending writes before the window goes away"""
+        self.stall_detector.stop()
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.writer.close()
+        self.history.close()
+        vault_diagnostics.finish(self.profiler, self.diagnostics_context())
+        if self.breach_checker is not None:
+            self.breach_checker.close()
+        if self.wordlist is not None:
+            self.wordlist.close()
+        self.root.destroy()
     
     def setup_ui(self):
         """Setup the main UI with Gen Z styling"""
@@ -80,17 +348,47 @@ class PasswordGenerator:
         self.style.configure('TNotebook', background=self.colors["bg"])
         self.style.configure('TNotebook.Tab', background=self.colors["secondary_bg"], foreground=self.colors["white"])
         self.style.map('TNotebook.Tab', background=[('selected', self.colors["purple"])])
+        self.style.configure("Treeview", 
+                       background=self.colors["accent"],
+                       foreground=self.colors["white"],
+                       fieldbackground=self.colors["accent"])
+        self.style.configure("Treeview.Heading", 
+                       background=self.colors["purple"],
+                       foreground=self.colors["white"])
         
-        # Create tabs
-        self.create_generator_tab()
-        self.create_saved_tab()
-        self.create_add_tab()
+        # Shared with the Saved tab, which may not be built yet
+        self.search_var = tk.StringVar()
+        self.search_var.trace("w", self.schedule_filter)
+        self.saved_view = None
+        
+        # Tabs are added empty and filled in the first time they are selected
+        self._tab_builders = {}
+        self.generator_frame = self.add_tab("🎲 Generate", self.create_generator_tab)
+        self.saved_frame = self.add_tab("💾 Saved", self.create_saved_tab)
+        self.add_frame = self.add_tab("➕ Add New", self.create_add_tab)
+        self.audit_frame = self.add_tab("🛡️ Audit", self.create_audit_tab)
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.build_tab(self.generator_frame)
+    
+    def add_tab(self, text, builder):
+        """Add an empty tab whose contents builder creates on first selection"""
+        frame = tk.Frame(self.notebook, bg=self.colors["bg"])
+        self.notebook.add(frame, text=text)
+        self._tab_builders[str(frame)] = builder
+        return frame
+    
+    def build_tab(self, frame):
+        """Create a tab's widgets unless that already happened"""
+        builder = self._tab_builders.pop(str(frame), None)
+        if builder is not None:
+            builder(frame)
+    
+    def on_tab_changed(self, event):
+        """Build the newly selected tab the first time it is shown"""
+        self.build_tab(self.notebook.select())
         
-    def create_generator_tab(self):
+    def create_generator_tab(self, generator_frame):
         """Create the password generator tab"""
-        generator_frame = tk.Frame(self.notebook, bg=self.colors["bg"])
-        self.notebook.add(generator_frame, text="🎲 Generate")
-        
         # Generator container
         gen_container = tk.Frame(generator_frame, bg=self.colors["secondary_bg"], relief="raised", bd=2)
         gen_container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -177,6 +475,76 @@ class PasswordGenerator:
             activeforeground=self.colors["white"]
         ).pack(anchor="w")
         
+        # Passphrase mode: diceware words instead of characters
+        mode_frame = tk.Frame(gen_container, bg=self.colors["secondary_bg"])
+        mode_frame.pack(fill="x", padx=20, pady=(10, 0))
+        
+        self.generator_mode = tk.StringVar(value="characters")
+        for text, value in (("🔤 Characters", "characters"), ("📖 Passphrase", "passphrase")):
+            tk.Radiobutton(
+                mode_frame,
+                text=text,
+                variable=self.generator_mode,
+                value=value,
+                font=("Arial", 10, "bold"),
+                fg=self.colors["white"],
+                bg=self.colors["secondary_bg"],
+                selectcolor=self.colors["purple"],
+                activebackground=self.colors["secondary_bg"],
+                activeforeground=self.colors["white"]
+            ).pack(side="left", padx=(0, 10))
+        
+        passphrase_frame = tk.Frame(gen_container, bg=self.colors["secondary_bg"])
+        passphrase_frame.pack(fill="x", padx=20, pady=10)
+        
+        self.words_var = tk.IntVar(value=password_core.DEFAULT_WORDS)
+        self.separator_var = tk.StringVar(value=password_core.DEFAULT_SEPARATOR)
+        self.capitalize_var = tk.StringVar(value="lower")
+        
+        tk.Label(
+            passphrase_frame,
+            text="Words:",
+            font=("Arial", 10),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        ).pack(side="left")
+        tk.Spinbox(
+            passphrase_frame,
+            from_=password_core.MIN_WORDS,
+            to=password_core.MAX_WORDS,
+            width=4,
+            textvariable=self.words_var,
+            font=("Arial", 10),
+            bg=self.colors["accent"],
+            fg=self.colors["white"]
+        ).pack(side="left", padx=(5, 15))
+        
+        tk.Label(
+            passphrase_frame,
+            text="Separator:",
+            font=("Arial", 10),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        ).pack(side="left")
+        tk.Entry(
+            passphrase_frame,
+            textvariable=self.separator_var,
+            width=4,
+            font=("Arial", 10),
+            bg=self.colors["accent"],
+            fg=self.colors["white"],
+            relief="flat"
+        ).pack(side="left", padx=(5, 15))
+        
+        tk.Label(
+            passphrase_frame,
+            text="Case:",
+            font=("Arial", 10),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        ).pack(side="left")
+        tk.OptionMenu(passphrase_frame, self.capitalize_var, *password_core.CAPITALIZATIONS).pack(side="left", padx=5)
+        
         # Generate button
         generate_btn = tk.Button(
             gen_container,
@@ -205,6 +573,15 @@ class PasswordGenerator:
         )
         password_entry.pack(fill="x", padx=20, pady=10)
         
+        self.entropy_var = tk.StringVar()
+        tk.Label(
+            gen_container,
+            textvariable=self.entropy_var,
+            font=("Arial", 10),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        ).pack()
+        
         # Copy button
         copy_btn = tk.Button(
             gen_container,
@@ -220,11 +597,8 @@ class PasswordGenerator:
         )
         copy_btn.pack(pady=10)
         
-    def create_saved_tab(self):
+    def create_saved_tab(self, saved_frame):
         """Create the saved passwords tab"""
-        saved_frame = tk.Frame(self.notebook, bg=self.colors["bg"])
-        self.notebook.add(saved_frame, text="💾 Saved")
-        
         # Search frame
         search_frame = tk.Frame(saved_frame, bg=self.colors["secondary_bg"])
         search_frame.pack(fill="x", padx=20, pady=10)
@@ -237,8 +611,6 @@ class PasswordGenerator:
             bg=self.colors["secondary_bg"]
         ).pack(side="left")
         
-        self.search_var = tk.StringVar()
-        self.search_var.trace("w", self.filter_passwords)
         search_entry = tk.Entry(
             search_frame,
             textvariable=self.search_var,
@@ -249,33 +621,41 @@ class PasswordGenerator:
         )
         search_entry.pack(side="right", fill="x", expand=True, padx=(10, 0))
         
+        # Progress while the vault loads in the background
+        self.load_status = tk.Label(
+            saved_frame,
+            text="Loading vault...",
+            font=("Arial", 10),
+            fg=self.colors["white"],
+            bg=self.colors["bg"]
+        )
+        self.load_status.pack(anchor="w", padx=20)
+        self.load_progress = ttk.Progressbar(saved_frame, mode="indeterminate")
+        self.load_progress.pack(fill="x", padx=20)
+        self.load_progress.start(10)
+        if not self.loading:
+            self.hide_progress()
+        
         # Treeview for passwords
         tree_frame = tk.Frame(saved_frame, bg=self.colors["bg"])
         tree_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self.saved_tree_frame = tree_frame
         
         columns = ("Website", "Username", "Password", "Date Added")
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
+        self.saved_view = VirtualTreeview(tree_frame, columns, self.row_values, height=15)
+        self.tree = self.saved_view.tree
         
-        # Configure columns
+        # Configure columns; clicking a sortable heading sorts by it
         for col in columns:
-            self.tree.heading(col, text=col)
+            if col in SORT_COLUMNS:
+                self.tree.heading(col, text=col, command=lambda col=col: self.sort_by(col))
+            else:
+                self.tree.heading(col, text=col)
             self.tree.column(col, width=150)
         
-        # Style the treeview
-        self.style.configure("Treeview", 
-                       background=self.colors["accent"],
-                       foreground=self.colors["white"],
-                       fieldbackground=self.colors["accent"])
-        self.style.configure("Treeview.Heading", 
-                       background=self.colors["purple"],
-                       foreground=self.colors["white"])
-        
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
+        # Scrollbar drives the virtual list rather than the Treeview itself
         self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        self.saved_view.scrollbar.pack(side="right", fill="y")
         
         # Buttons frame
         btn_frame = tk.Frame(saved_frame, bg=self.colors["bg"])
@@ -294,6 +674,19 @@ class PasswordGenerator:
             cursor="hand2"
         ).pack(side="left", padx=(0, 10))
         
+        tk.Button(
+            btn_frame,
+            text="📋 Copy",
+            command=self.copy_saved_password,
+            font=("Arial", 10),
+            bg=self.colors["cyan"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left", padx=(0, 10))
+        
         tk.Button(
             btn_frame,
             text="🗑️ Delete",
@@ -320,14 +713,67 @@ class PasswordGenerator:
             cursor="hand2"
         ).pack(side="left")
         
+        tk.Button(
+            btn_frame,
+            text="📤 Export",
+            command=self.export_passwords,
+            font=("Arial", 10),
+            bg=self.colors["accent"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="right")
+        
+        tk.Button(
+            btn_frame,
+            text="📥 Import",
+            command=self.import_passwords,
+            font=("Arial", 10),
+            bg=self.colors["accent"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="right", padx=(0, 10))
+        
+        # Changing a password keeps the old one in the entry's history
+        history_frame = tk.Frame(saved_frame, bg=self.colors["bg"])
+        history_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        tk.Button(
+            history_frame,
+            text="✏️ Change Password",
+            command=self.change_password,
+            font=("Arial", 10),
+            bg=self.colors["purple"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left", padx=(0, 10))
+        
+        tk.Button(
+            history_frame,
+            text="🕘 History",
+            command=self.show_history,
+            font=("Arial", 10),
+            bg=self.colors["purple"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left")
+        
         # Load saved passwords
         self.load_saved_passwords()
         
-    def create_add_tab(self):
+    def create_add_tab(self, add_frame):
         """Create the add new password tab"""
-        add_frame = tk.Frame(self.notebook, bg=self.colors["bg"])
-        self.notebook.add(add_frame, text="➕ Add New")
-        
         # Form container
         form_container = tk.Frame(add_frame, bg=self.colors["secondary_bg"], relief="raised", bd=2)
         form_container.pack(fill="both", expand=True, padx=20, pady=20)
@@ -437,26 +883,235 @@ class PasswordGenerator:
         )
         save_btn.pack(pady=20)
         
+    def create_audit_tab(self, audit_frame):
+        """Create the password audit tab"""
+        # Run button and summary
+        top_frame = tk.Frame(audit_frame, bg=self.colors["secondary_bg"])
+        top_frame.pack(fill="x", padx=20, pady=10)
+        
+        self.audit_btn = tk.Button(
+            top_frame,
+            text="🛡️ Run Audit",
+            command=self.run_audit,
+            font=("Arial", 12, "bold"),
+            bg=self.colors["purple"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=15,
+            pady=5,
+            cursor="hand2"
+        )
+        self.audit_btn.pack(side="left")
+        
+        self.audit_summary = tk.Label(
+            top_frame,
+            text="Check your vault for weak and reused passwords",
+            font=("Arial", 12),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        )
+        self.audit_summary.pack(side="left", padx=(15, 0))
+        
+        # Results, weakest and most reused first
+        results_frame = tk.Frame(audit_frame, bg=self.colors["bg"])
+        results_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        columns = ("Website", "Username", "Strength", "Entropy", "Reused", "Breached")
+        self.audit_view = VirtualTreeview(results_frame, columns, self.audit_row_values, height=15)
+        for col in columns:
+            self.audit_view.tree.heading(col, text=col)
+            self.audit_view.tree.column(col, width=120)
+        self.audit_view.tree.pack(side="left", fill="both", expand=True)
+        self.audit_view.scrollbar.pack(side="right", fill="y")
+        
+    def audit_row_values(self, result):
+        """Treeview values for an audit result"""
+        return (
+            result["website"],
+            result["username"],
+            result["strength"],
+            f"{result['entropy']:.0f} bits",
+            f"{result['reused']}x" if result["reused"] else "—",
+            "🚨 yes" if result["breached"] else "—"
+        )
+    
+    def run_audit(self):
+        """Score every saved password in the background"""
+        if self.loading:
+            messagebox.showwarning("Warning", "Your vault is still loading, try again in a moment!")
+            return
+        if not self.ensure_unlocked():
+            return
+        
+        entries = self.index.to_list()
+        self.audit_btn.configure(state="disabled")
+        self.audit_summary.configure(text="Auditing...")
+        self.run_in_background(lambda: self.auditor.audit(entries), self.on_audit_done)
+    
+    def on_audit_done(self, results):
+        """Show audit results"""
+        self.audit_btn.configure(state="normal")
+        if isinstance(results, Exception):
+            self.audit_summary.configure(text="Audit failed")
+            messagebox.showerror("Error", f"Could not audit passwords: {str(results)}")
+            return
+        summary = summarize(results)
+        self.audit_summary.configure(
+            text=f"{summary['total']:,} passwords · {summary['weak']:,} weak · {summary['reused']:,} reused"
+                 f" · {summary['breached']:,} breached")
+        self.audit_view.set_rows(results)
+    
+    def toggle_diagnostics(self, event=None):
+        """Show or hide the diagnostics tab (Ctrl+Shift+D)"""
+        if self.diagnostics_frame is None:
+            self.create_diagnostics_tab()
+        elif self.notebook.tab(self.diagnostics_frame, "state") == "hidden":
+            self.notebook.add(self.diagnostics_frame)
+        else:
+            self.notebook.hide(self.diagnostics_frame)
+            return
+        self.notebook.select(self.diagnostics_frame)
+        self.refresh_diagnostics()
+    
+    def create_diagnostics_tab(self):
+        """Create the hidden diagnostics tab with live timings"""
+        self.diagnostics_frame = tk.Frame(self.notebook, bg=self.colors["bg"])
+        self.notebook.add(self.diagnostics_frame, text="🩺 Diagnostics")
+        
+        top_frame = tk.Frame(self.diagnostics_frame, bg=self.colors["secondary_bg"])
+        top_frame.pack(fill="x", padx=20, pady=10)
+        
+        tk.Button(
+            top_frame,
+            text="🔄 Refresh",
+            command=self.refresh_diagnostics,
+            font=("Arial", 12, "bold"),
+            bg=self.colors["purple"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=15,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left")
+        
+        tk.Button(
+            top_frame,
+            text="💾 Save Report",
+            command=self.save_diagnostics,
+            font=("Arial", 12, "bold"),
+            bg=self.colors["cyan"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=15,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left", padx=(10, 0))
+        
+        self.diagnostics_summary = tk.Label(
+            top_frame,
+            text="",
+            font=("Arial", 12),
+            fg=self.colors["white"],
+            bg=self.colors["secondary_bg"]
+        )
+        self.diagnostics_summary.pack(side="left", padx=(15, 0))
+        
+        columns = ("Operation", "Calls", "Mean ms", "p95 ms", "Max ms")
+        self.diagnostics_tree = ttk.Treeview(self.diagnostics_frame, columns=columns, show="headings", height=15)
+        for col in columns:
+            self.diagnostics_tree.heading(col, text=col)
+            self.diagnostics_tree.column(col, width=120)
+        self.diagnostics_tree.pack(fill="both", expand=True, padx=20, pady=10)
+    
+    def diagnostics_context(self):
+        """Vault details included in diagnostics reports"""
+        return {"entries": len(self.index), "storage": type(self.storage).__name__,
+                "encrypted": self.cipher.enabled()}
+    
+    def refresh_diagnostics(self):
+        """Show the latest timings in the diagnostics tab"""
+        snapshot = metrics.snapshot()
+        self.diagnostics_tree.delete(*self.diagnostics_tree.get_children())
+        for name, timing in snapshot["timings"].items():
+            self.diagnostics_tree.insert("", "end", values=(
+                name, f"{timing['count']:,}", f"{timing['mean_ms']:.2f}",
+                f"{timing['p95_ms']:.2f}", f"{timing['max_ms']:.2f}"))
+        stalls = snapshot["counters"].get("event_loop.stalls", 0)
+        self.diagnostics_summary.configure(text=f"{len(self.index):,} entries · {stalls:,} event loop stalls")
+    
+    def save_diagnostics(self):
+        """Write a JSON diagnostics report to attach to a bug report"""
+        path = filedialog.asksaveasfilename(
+            title="Save diagnostics report",
+            defaultextension=".json",
+            initialfile="vault-diagnostics.json",
+            filetypes=[("JSON files", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            vault_diagnostics.write_report(path, self.diagnostics_context())
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save report: {str(e)}")
+            return
+        messagebox.showinfo("Success", "Diagnostics report saved! 🩺")
+        
     def generate_password(self):
-        """Generate a random password based on selected options"""
-        length = self.length_var.get()
-        chars = ""
-        
-        if self.use_uppercase.get():
-            chars += string.ascii_uppercase
-        if self.use_lowercase.get():
-            chars += string.ascii_lowercase
-        if self.use_numbers.get():
-            chars += string.digits
-        if self.use_symbols.get():
-            chars += "!@#$%^&*()_+-=[]{}|;:,.<>?"
-        
-        if not chars:
-            messagebox.showwarning("Warning", "Please select at least one character type!")
+        """Generate a random password or passphrase based on selected options"""
+        if self.generator_mode.get() == "passphrase":
+            wordlist = self.get_wordlist()
+            if wordlist is None:
+                return
+            words = self.words_var.get()
+            generate = lambda: password_core.generate_passphrase(
+                wordlist, words, self.separator_var.get(), self.capitalize_var.get())
+            bits = password_core.entropy_bits(words, len(wordlist))
+        else:
+            chars = password_core.build_charset(
+                uppercase=self.use_uppercase.get(),
+                lowercase=self.use_lowercase.get(),
+                numbers=self.use_numbers.get(),
+                symbols=self.use_symbols.get()
+            )
+            length = self.length_var.get()
+            generate = lambda: password_core.generate_password(length, chars)
+            bits = password_core.entropy_bits(length, len(set(chars)))
+        
+        try:
+            password = self.unbreached_password(generate)
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
             return
         
-        password = ''.join(random.choice(chars) for _ in range(length))
         self.password_var.set(password)
+        self.entropy_var.set(f"🧮 Entropy: {bits:.0f} bits")
+    
+    def get_wordlist(self):
+        """The passphrase wordlist, mapped the first time it's needed (None if there isn't one)"""
+        if self.wordlist is None:
+            try:
+                self.wordlist = open_wordlist()
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return None
+            if self.wordlist is None:
+                messagebox.showwarning(
+                    "Warning",
+                    f"No passphrase wordlist at {default_wordlist_file()}!\n\n"
+                    "Convert one with: python vault_cli.py wordlist-convert words.txt " + default_wordlist_file())
+        return self.wordlist
+    
+    def unbreached_password(self, generate):
+        """Call generate until it returns a password that isn't in the breach database"""
+        password = generate()
+        if self.breach_checker is None:
+            return password
+        for _ in range(MAX_REGENERATE):
+            if password not in self.breach_checker:
+                return password
+            password = generate()
+        messagebox.showwarning("Warning", "Couldn't find a password that isn't in the breach list, try a longer one! 🚨")
+        return password
         
     def copy_password(self):
         """Copy password to clipboard"""
@@ -468,94 +1123,344 @@ class PasswordGenerator:
         else:
             messagebox.showwarning("Warning", "No password to copy!")
     
+    def row_values(self, entry):
+        """Treeview values for a saved entry"""
+        # Entries are Records, so the mask is already computed
+        return (
+            entry.website,
+            entry.username,
+            entry.mask,
+            entry.date_added
+        )
+    
+    @metrics.timed("load_saved_passwords")
     def load_saved_passwords(self):
         """Load saved passwords into the treeview"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for entry in self.passwords_data["websites"]:
-            self.tree.insert("", "end", values=(
-                entry["website"],
-                entry["username"],
-                "•" * len(entry["password"]),
-                entry["date_added"]
-            ))
+        self.saved_view.set_rows(self.sorted_rows(self.index))
+    
+    def schedule_filter(self, *args):
+        """Debounce search typing so only the last keystroke runs a search"""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.filter_passwords)
     
+    @metrics.timed("filter_passwords")
     def filter_passwords(self, *args):
         """Filter passwords based on search term"""
-        search_term = self.search_var.get().lower()
-        
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        for entry in self.passwords_data["websites"]:
-            if (search_term in entry["website"].lower() or 
-                search_term in entry["username"].lower()):
-                self.tree.insert("", "end", values=(
-                    entry["website"],
-                    entry["username"],
-                    "•" * len(entry["password"]),
-                    entry["date_added"]
-                ))
+        self._search_after_id = None
+        search_term = self.search_var.get()
+        self.saved_view.set_rows(self.sorted_rows(self.search_entries(search_term)))
+    
+    @metrics.timed("sort_by")
+    def sort_by(self, heading):
+        """Sort the Saved tab by a column, or reverse the order if it is already sorted by it"""
+        # The first sort by a column builds its order here on the Tk thread (seconds at a
+        # million entries); after that the order is kept and switching is cheap
+        column = SORT_COLUMNS[heading]
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        for col, sortable in SORT_COLUMNS.items():
+            arrow = (" ▼" if self.sort_descending else " ▲") if sortable == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.filter_passwords()
+    
+    def sorted_rows(self, entries):
+        """Entries in the Saved tab's sort order, or unchanged if no column is sorted"""
+        if self.sort_column is None:
+            return entries
+        return self.sort_index.sort(entries, self.sort_column, self.sort_descending)
+    
+    def show_entry(self, entry):
+        """Insert an entry into the Saved tab where the current sort order puts it"""
+        position = None
+        if self.sort_column is not None:
+            position = sorted_position(self.saved_view.rows, entry, self.sort_column, self.sort_descending)
+        self.saved_view.insert_row(entry, position)
+    
+    def search_entries(self, search_term):
+        """Entries matching a search term, filtered by the storage backend when it can"""
+        if not search_term:
+            return self.index
+        if is_url_query(search_term):
+            # A pasted URL finds the credentials for its site and related domains
+            return self.domain_index.search(search_term)
+        if self.search_index is None:
+            found = (self.index.get(website, username)
+                     for website, username in self.storage.search(search_term))
+            return [entry for entry in found if entry is not None]
+        return self.search_index.search(search_term)
     
     def show_password(self):
         """Show the selected password"""
-        selection = self.tree.selection()
-        if not selection:
+        entry = self.saved_view.selected_row()
+        if entry is None:
             messagebox.showwarning("Warning", "Please select a password to view!")
             return
-        
-        item = self.tree.item(selection[0])
-        website = item["values"][0]
-        username = item["values"][1]
-        
-        # Find the actual password
-        for entry in self.passwords_data["websites"]:
-            if entry["website"] == website and entry["username"] == username:
-                messagebox.showinfo("Password", f"Password: {entry['password']}")
-                break
+        self.show_entry_password(entry)
+    
+    def show_entry_password(self, entry):
+        """Show one entry's (or one old version's) password"""
+        password = self.reveal_password(entry)
+        if password is not None:
+            messagebox.showinfo("Password", f"Password: {password}")
+    
+    def copy_saved_password(self):
+        """Copy the selected saved password to the clipboard"""
+        entry = self.saved_view.selected_row()
+        if entry is None:
+            messagebox.showwarning("Warning", "Please select a password to copy!")
+            return
+        self.copy_entry_password(entry)
+    
+    def copy_entry_password(self, entry):
+        """Copy one entry's (or one old version's) password to the clipboard"""
+        password = self.reveal_password(entry)
+        if password is not None:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(password)
+            messagebox.showinfo("Success", "Password copied to clipboard! 📋")
     
     def delete_password(self):
         """Delete the selected password"""
-        selection = self.tree.selection()
-        if not selection:
+        entry = self.saved_view.selected_row()
+        if entry is None:
             messagebox.showwarning("Warning", "Please select a password to delete!")
             return
         
         if messagebox.askyesno("Confirm", "Are you sure you want to delete this password?"):
-            item = self.tree.item(selection[0])
-            website = item["values"][0]
-            username = item["values"][1]
-            
             # Remove from data
-            self.passwords_data["websites"] = [
-                entry for entry in self.passwords_data["websites"]
-                if not (entry["website"] == website and entry["username"] == username)
-            ]
+            self.forget_entry(entry["website"], entry["username"])
             
-            self.save_data()
-            self.load_saved_passwords()
+            self.save_data(("delete", entry))
+            self.saved_view.remove_row(entry)
             messagebox.showinfo("Success", "Password deleted! 🗑️")
     
+    def change_password(self):
+        """Give the selected entry a new password, keeping the old one in its history"""
+        entry = self.saved_view.selected_row()
+        if entry is None:
+            messagebox.showwarning("Warning", "Please select a password to change!")
+            return
+        if self.loading:
+            messagebox.showwarning("Warning", "Your vault is still loading, try again in a moment!")
+            return
+        
+        password = simpledialog.askstring(
+            "✏️ Change Password",
+            f"New password for {entry['username']} on {entry['website']}\n(leave blank to generate one):",
+            parent=self.root)
+        if password is None:
+            return
+        password = password.strip() or self.unbreached_password(
+            lambda: password_core.generate_password(password_core.DEFAULT_LENGTH, password_core.FORM_CHARSET))
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        new_entry = dict(entry, password=password, date_changed=now)
+        if self.cipher.enabled():
+            if not self.ensure_unlocked():
+                return
+            new_entry = self.cipher.seal(new_entry)
+        new_entry = Record.from_dict(new_entry)
+        
+        # The old password goes to history first, so a failed write loses nothing
+        try:
+            self.history.record(entry, now)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the old password to history: {str(e)}")
+            return
+        
+        self.forget_entry(entry["website"], entry["username"])
+        self.index.add(new_entry)
+        self.index_for_search([new_entry])
+        self.save_data(("add", new_entry))
+        
+        self.saved_view.remove_row(entry)
+        if is_url_query(self.search_var.get()):
+            self.filter_passwords()
+        else:
+            self.show_entry(new_entry)
+        messagebox.showinfo("Success", "Password changed! The old one is in 🕘 History.")
+    
+    def show_history(self):
+        """List the selected entry's earlier passwords"""
+        entry = self.saved_view.selected_row()
+        if entry is None:
+            messagebox.showwarning("Warning", "Please select a password to see its history!")
+            return
+        try:
+            versions = self.history.versions(entry["website"], entry["username"])
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read the password history: {str(e)}")
+            return
+        if not versions:
+            messagebox.showinfo("History", "This password has never been changed.")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"🕘 {entry['website']} ({entry['username']})")
+        window.configure(bg=self.colors["bg"])
+        
+        columns = ("Password", "Set", "Replaced")
+        tree = ttk.Treeview(window, columns=columns, show="headings", height=min(len(versions), 10))
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=150)
+        for i, version in enumerate(versions):
+            tree.insert("", "end", iid=str(i),
+                        values=(masked(version["password"]), version["date_added"], version["date_changed"]))
+        tree.pack(fill="both", expand=True, padx=20, pady=(20, 10))
+        
+        def for_selected_version(action, then):
+            selection = tree.selection()
+            if not selection:
+                messagebox.showwarning("Warning", f"Please select a version to {action}!", parent=window)
+                return
+            then(versions[int(selection[0])])
+        
+        btn_frame = tk.Frame(window, bg=self.colors["bg"])
+        btn_frame.pack(fill="x", padx=20, pady=(0, 20))
+        
+        tk.Button(
+            btn_frame,
+            text="👁️ Show Password",
+            command=lambda: for_selected_version("view", self.show_entry_password),
+            font=("Arial", 10),
+            bg=self.colors["cyan"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left", padx=(0, 10))
+        
+        tk.Button(
+            btn_frame,
+            text="📋 Copy",
+            command=lambda: for_selected_version("copy", self.copy_entry_password),
+            font=("Arial", 10),
+            bg=self.colors["cyan"],
+            fg=self.colors["white"],
+            relief="flat",
+            padx=10,
+            pady=5,
+            cursor="hand2"
+        ).pack(side="left")
+    
     def open_website(self):
         """Open the selected website"""
-        selection = self.tree.selection()
-        if not selection:
+        entry = self.saved_view.selected_row()
+        if entry is None:
             messagebox.showwarning("Warning", "Please select a website to open!")
             return
         
-        item = self.tree.item(selection[0])
-        website = item["values"][0]
+        website = entry["website"]
         
         # Add https if not present
         if not website.startswith(('http://', 'https://')):
             website = 'https://' + website
         
+        # Imported here since most sessions never open a website
+        import webbrowser
         try:
             webbrowser.open(website)
         except:
             messagebox.showerror("Error", "Could not open website!")
     
+    def import_passwords(self):
+        """Import a CSV export in the background, skipping entries the vault already has"""
+        if self.loading:
+            messagebox.showwarning("Warning", "Your vault is still loading, try again in a moment!")
+            return
+        path = filedialog.askopenfilename(
+            title="Import passwords",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not path or not self.ensure_unlocked():
+            return
+        
+        import vault_io
+        
+        # Bounded so a fast reader can't pull the whole file into memory
+        batches = queue.Queue(maxsize=4)
+        
+        def read_batches():
+            try:
+                for batch in vault_io.iter_import_batches(path):
+                    batches.put(batch)
+                batches.put(None)
+            except Exception as e:
+                batches.put(e)
+        
+        self.loading = True
+        self._import_counts = [0, 0]
+        self.show_progress("Importing...")
+        threading.Thread(target=read_batches, daemon=True).start()
+        self.root.after(LOAD_POLL_MS, self.poll_import, batches)
+    
+    def poll_import(self, batches):
+        """Apply one batch parsed by the import thread, with a single storage write"""
+        try:
+            batch = batches.get_nowait()
+        except queue.Empty:
+            self.root.after(LOAD_POLL_MS, self.poll_import, batches)
+            return
+        
+        if isinstance(batch, list):
+            import vault_io
+            if self.cipher.enabled():
+                batch = [self.cipher.seal(entry) for entry in batch]
+            batch = [Record.from_dict(entry) for entry in batch]
+            new_entries = vault_io.add_new_entries(self.index, batch)
+            self.index_for_search(new_entries)
+            self.save_data(*[("add", entry) for entry in new_entries])
+            self._import_counts[0] += len(new_entries)
+            self._import_counts[1] += len(batch) - len(new_entries)
+            self.load_status.configure(
+                text=f"Importing... {self._import_counts[0]:,} added, {self._import_counts[1]:,} duplicates skipped")
+            self.root.after(1, self.poll_import, batches)
+            return
+        
+        # The reader finished (None) or failed (an exception)
+        self.loading = False
+        self.hide_progress()
+        self.filter_passwords()
+        added, skipped = self._import_counts
+        if isinstance(batch, Exception):
+            messagebox.showerror("Error", f"Import stopped after {added:,} entries: {str(batch)}")
+        else:
+            messagebox.showinfo("Success", f"Imported {added:,} passwords, skipped {skipped:,} duplicates! 📥")
+    
+    def export_passwords(self):
+        """Write the vault to a CSV file in the background"""
+        if self.loading:
+            messagebox.showwarning("Warning", "Your vault is still loading, try again in a moment!")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export passwords",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not path or not self.ensure_unlocked():
+            return
+        
+        import vault_io
+        
+        entries = self.index.to_list()
+        cipher = self.cipher
+        
+        def done(result):
+            if isinstance(result, Exception):
+                messagebox.showerror("Error", f"Could not export: {str(result)}")
+            else:
+                messagebox.showinfo("Success", f"Exported {result:,} passwords! 📤")
+        
+        self.run_in_background(
+            lambda: vault_io.export_csv((dict(entry, password=cipher.reveal(entry)) for entry in entries), path),
+            done)
+    
     def toggle_password_visibility(self):
         """Toggle password visibility in the add form"""
         # This would need to be implemented with a custom Entry widget
@@ -566,8 +1471,8 @@ class PasswordGenerator:
     def generate_for_form(self):
         """Generate password for the add form"""
         # Use default settings for form generation
-        chars = string.ascii_letters + string.digits + "!@#$%^&*"
-        password = ''.join(random.choice(chars) for _ in range(16))
+        password = self.unbreached_password(
+            lambda: password_core.generate_password(password_core.DEFAULT_LENGTH, password_core.FORM_CHARSET))
         self.new_password_var.set(password)
     
     def save_new_password(self):
@@ -580,11 +1485,14 @@ class PasswordGenerator:
             messagebox.showwarning("Warning", "Please fill in all fields!")
             return
         
+        if self.loading:
+            messagebox.showwarning("Warning", "Your vault is still loading, try again in a moment!")
+            return
+        
         # Check if entry already exists
-        for entry in self.passwords_data["websites"]:
-            if entry["website"] == website and entry["username"] == username:
-                messagebox.showwarning("Warning", "This website/username combination already exists!")
-                return
+        if self.index.get(website, username) is not None:
+            messagebox.showwarning("Warning", "This website/username combination already exists! Use ✏️ Change Password in the Saved tab to update it.")
+            return
         
         # Add new entry
         new_entry = {
@@ -593,17 +1501,29 @@ class PasswordGenerator:
             "password": password,
             "date_added": datetime.now().strftime("%Y-%m-%d %H:%M")
         }
+        if self.cipher.enabled():
+            if not self.ensure_unlocked():
+                return
+            new_entry = self.cipher.seal(new_entry)
+        new_entry = Record.from_dict(new_entry)
         
-        self.passwords_data["websites"].append(new_entry)
-        self.save_data()
+        self.index.add(new_entry)
+        self.index_for_search([new_entry])
+        self.save_data(("add", new_entry))
         
         # Clear form
         self.website_var.set("")
         self.username_var.set("")
         self.new_password_var.set("")
         
-        # Refresh saved passwords
-        self.load_saved_passwords()
+        # Show the new entry if it matches the current search
+        if self.saved_view is not None:
+            search_term = self.search_var.get()
+            if is_url_query(search_term):
+                # Where it belongs depends on how closely its domain matches
+                self.filter_passwords()
+            elif matches(new_entry, search_term.lower()):
+                self.show_entry(new_entry)
         
         # Switch to saved tab
         self.notebook.select(1)
@@ -0,0 +1,98 @@
+import hashlib
+import hmac
+import math
+import secrets
+import string
+
+from password_core import SYMBOLS
+from vault_index import entry_key
+
+# Size of each character class, used to estimate brute-force entropy
+CLASS_POOLS = (
+    ("a", frozenset(string.ascii_lowercase)),
+    ("A", frozenset(string.ascii_uppercase)),
+    ("1", frozenset(string.digits)),
+    ("!", frozenset(SYMBOLS)),
+)
+# Anything outside the classes above (spaces, accents, emoji...)
+OTHER_POOL = 100
+
+# Minimum entropy in bits for each rating, strongest first
+STRENGTH_LEVELS = ((80, "💪 strong"), (60, "👍 good"), (40, "😬 fair"), (0, "🚨 weak"))
+
+AUDIT_COLUMNS = ("website", "username", "strength", "entropy", "length", "charsets", "reused", "breached")
+
+
+def score_password(password):
+    """Entropy estimate and character class coverage for one password"""
+    classes = ""
+    pool = 0
+    leftover = set(password)
+    for name, chars in CLASS_POOLS:
+        if not leftover.isdisjoint(chars):
+            classes += name
+            pool += len(chars)
+            leftover -= chars
+    if leftover:
+        classes += "?"
+        pool += OTHER_POOL
+    bits = len(password) * math.log2(pool) if pool else 0.0
+    strength = next(label for minimum, label in STRENGTH_LEVELS if bits >= minimum)
+    return {"entropy": round(bits, 1), "length": len(password), "charsets": classes, "strength": strength}
+
+
+class VaultAuditor:
+    """Scores every entry and finds reused passwords in a single pass
+
+    Reuse is found by grouping entries on an HMAC of the password under a
+    per-session random key, so plaintext is never kept and no pair of
+    entries is ever compared directly. Scores are cached per entry and only
+    recomputed when the stored password value changes. With a breach_checker
+    each password is also looked up in the offline breach database.
+    """
+
+    def __init__(self, reveal=lambda entry: entry["password"], breach_checker=None):
+        self.reveal = reveal
+        self.breach_checker = breach_checker
+        self._hmac_key = secrets.token_bytes(32)
+        self._cache = {}
+        self.recomputed = 0
+
+    def audit(self, entries):
+        """Return one result dict per entry: breached, then most reused, then weakest first"""
+        cache = {}
+        groups = {}
+        results = []
+        self.recomputed = 0
+        for entry in entries:
+            key = entry_key(entry)
+            cached = self._cache.get(key)
+            if cached is None or cached[0] != entry["password"]:
+                password = self.reveal(entry)
+                fingerprint = hmac.new(self._hmac_key, password.encode(), hashlib.sha256).digest()
+                score = score_password(password)
+                score["breached"] = self.breach_checker is not None and password in self.breach_checker
+                cached = (entry["password"], score, fingerprint)
+                self.recomputed += 1
+            cache[key] = cached
+            result = dict(cached[1], website=entry["website"], username=entry["username"])
+            groups.setdefault(cached[2], []).append(result)
+            results.append(result)
+        # Entries deleted since the last audit fall out of the cache here
+        self._cache = cache
+
+        for group in groups.values():
+            for result in group:
+                result["reused"] = len(group) - 1
+        results.sort(key=lambda result: (not result["breached"], -result["reused"], result["entropy"]))
+        return results
+
+
+def summarize(results):
+    """Counts shown above the audit table"""
+    return {
+        "total": len(results),
+        "weak": sum(1 for result in results if result["strength"] == STRENGTH_LEVELS[-1][1]),
+        "reused": sum(1 for result in results if result["reused"]),
+        "breached": sum(1 for result in results if result["breached"]),
+    }
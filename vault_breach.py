@@ -0,0 +1,144 @@
+import hashlib
+import heapq
+import mmap
+import os
+import tempfile
+
+# Each record is one raw SHA-1 digest; the file is just these, sorted
+RECORD_SIZE = 20
+
+# Digests sorted in memory per run while converting a text dump
+SORT_CHUNK = 5_000_000
+
+# Fresh passwords to try before giving up on finding one not in the dump
+MAX_REGENERATE = 10
+
+
+def default_breach_file():
+    """Binary breach database: $PASSWORD_VAULT_BREACH_DB or next to the vault"""
+    return os.environ.get("PASSWORD_VAULT_BREACH_DB") or os.path.join(
+        os.path.expanduser("~/Documents"), "pwned-passwords.bin")
+
+
+class BreachChecker:
+    """Membership test against a sorted file of SHA-1 digests, via mmap
+
+    Nothing is read into memory up front; each lookup touches a handful of
+    pages. SHA-1 digests are uniformly spread, so the search starts from an
+    interpolated guess and only bisects the small window around it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size % RECORD_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a breach database (size isn't a multiple of {RECORD_SIZE})")
+        self.count = size // RECORD_SIZE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _at(self, i):
+        return self._map[i * RECORD_SIZE:(i + 1) * RECORD_SIZE]
+
+    def contains_digest(self, digest):
+        """Whether a raw SHA-1 digest is in the file"""
+        n = self.count
+        if not n:
+            return False
+        guess = min((int.from_bytes(digest[:8], "big") * n) >> 64, n - 1)
+        # Widen [lo, hi) around the guess until it brackets the digest
+        lo, hi, step = guess, guess + 1, 16
+        while lo > 0 and self._at(lo) > digest:
+            lo = max(0, lo - step)
+            step *= 2
+        step = 16
+        while hi < n and self._at(hi - 1) < digest:
+            hi = min(n, hi + step)
+            step *= 2
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._at(mid)
+            if record == digest:
+                return True
+            if record < digest:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def __contains__(self, password):
+        return self.contains_digest(hashlib.sha1(password.encode()).digest())
+
+    def close(self):
+        if self.count:
+            self._map.close()
+        self._file.close()
+
+
+def open_breach_checker(path=None):
+    """BreachChecker for the configured database, or None when there isn't one"""
+    path = path or default_breach_file()
+    if not os.path.exists(path):
+        return None
+    return BreachChecker(path)
+
+
+def _parse_digests(lines):
+    """Raw digests from HIBP-style 'HEX:COUNT' (or bare HEX) lines"""
+    for line in lines:
+        try:
+            digest = bytes.fromhex(line.split(":", 1)[0].strip())
+        except ValueError:
+            continue
+        if len(digest) == RECORD_SIZE:
+            yield digest
+
+
+def convert_text_dump(src, dst, chunk=SORT_CHUNK):
+    """Convert a text SHA-1 dump to the sorted binary format, returning the record count
+
+    Digests are sorted in runs of chunk records, spilled to temp files and
+    merged, so memory use stays bounded whatever the dump's size or order.
+    Duplicate hashes are written once.
+    """
+    runs = []
+    run = []
+    with open(src, "r", encoding="ascii", errors="ignore") as f:
+        for digest in _parse_digests(f):
+            run.append(digest)
+            if len(run) >= chunk:
+                runs.append(_write_run(sorted(run)))
+                run = []
+    run.sort()
+
+    def read_run(path):
+        with open(path, "rb") as f:
+            while True:
+                record = f.read(RECORD_SIZE)
+                if not record:
+                    return
+                yield record
+
+    count = 0
+    previous = None
+    tmp_dst = dst + ".tmp"
+    try:
+        with open(tmp_dst, "wb") as out:
+            for digest in heapq.merge(run, *(read_run(path) for path in runs)):
+                if digest != previous:
+                    out.write(digest)
+                    count += 1
+                    previous = digest
+        os.replace(tmp_dst, dst)
+    finally:
+        for path in runs:
+            os.remove(path)
+    return count
+
+
+def _write_run(digests):
+    fd, path = tempfile.mkstemp(suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(digests))
+    return path
@@ -0,0 +1,367 @@
+import argparse
+import csv
+import getpass
+import json
+import sys
+from datetime import datetime
+
+import password_core
+import vault_audit
+import vault_breach
+import vault_io
+import vault_wordlist
+from vault_crypto import VaultCipher, is_encrypted, key_file_for, masked
+import vault_history
+from vault_history import DATE_FORMAT, HistoryStore, history_file_for
+from vault_index import DomainIndex, PasswordIndex
+from vault_storage import DEFAULT_BACKEND, default_data_file, open_storage
+
+
+def open_vault(args):
+    """Open the vault named on the command line and index its entries"""
+    storage = open_storage(args.vault, args.backend)
+    return storage, PasswordIndex(storage.load()["websites"])
+
+
+def unlock_vault(args):
+    """Prompt for the master password of an encrypted vault, or return None if it isn't encrypted"""
+    cipher = VaultCipher(key_file_for(args.vault))
+    if not cipher.enabled():
+        return None
+    cipher.unlock(getpass.getpass("Master password: "))
+    return cipher
+
+
+def cmd_generate(args):
+    """Stream passwords (or passphrases, with --words) to stdout or a file"""
+    if args.words:
+        cmd_generate_passphrases(args)
+        return
+    chars = password_core.build_charset(
+        uppercase=not args.no_uppercase,
+        lowercase=not args.no_lowercase,
+        numbers=not args.no_numbers,
+        symbols=not args.no_symbols,
+    )
+    if args.shard_dir:
+        paths = password_core.generate_sharded(
+            args.count, args.shard_dir, args.length, chars, workers=args.workers,
+            merge_to=args.output, unique=args.unique, batch_size=args.batch_size)
+        print(f"Wrote {args.count} passwords to {len(paths)} shards in {args.shard_dir}", file=sys.stderr)
+        return
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        batches = password_core.iter_batches(args.count, args.length, chars, args.batch_size, args.unique)
+        for batch in batches:
+            out.write("\n".join(batch) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def cmd_generate_passphrases(args):
+    """The --words half of generate"""
+    if args.shard_dir:
+        raise ValueError("--shard-dir only generates character passwords")
+    wordlist = vault_wordlist.open_wordlist(args.wordlist)
+    if wordlist is None:
+        raise ValueError(f"No wordlist at {args.wordlist or vault_wordlist.default_wordlist_file()} "
+                         "(convert one with vault_cli.py wordlist-convert)")
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        batches = password_core.iter_passphrase_batches(
+            args.count, wordlist, args.words, args.separator, args.capitalize, args.batch_size, args.unique)
+        for batch in batches:
+            out.write("\n".join(batch) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        wordlist.close()
+    bits = password_core.entropy_bits(args.words, len(wordlist))
+    print(f"{bits:.1f} bits of entropy per passphrase", file=sys.stderr)
+
+
+def cmd_import(args):
+    """Import a CSV export, skipping credentials the vault already has"""
+    cipher = unlock_vault(args)
+    storage, index = open_vault(args)
+    added = skipped = 0
+    try:
+        for batch in vault_io.iter_import_batches(args.path, args.batch_size):
+            if cipher is not None:
+                batch = [cipher.seal(entry) for entry in batch]
+            new_entries = vault_io.add_new_entries(index, batch)
+            storage.apply([("add", entry) for entry in new_entries])
+            added += len(new_entries)
+            skipped += len(batch) - len(new_entries)
+            print(f"\rImported {added:,}, skipped {skipped:,} duplicates", end="", file=sys.stderr)
+    finally:
+        storage.close()
+    print(file=sys.stderr)
+
+
+def cmd_export(args):
+    """Write the vault to a CSV file"""
+    cipher = unlock_vault(args)
+    storage, index = open_vault(args)
+    storage.close()
+    entries = index if cipher is None else (dict(entry, password=cipher.reveal(entry)) for entry in index)
+    count = vault_io.export_csv(entries, args.path, args.format)
+    print(f"Exported {count:,} entries to {args.path}", file=sys.stderr)
+
+
+def cmd_encrypt(args):
+    """Set a master password and encrypt every stored password"""
+    cipher = unlock_vault(args)
+    if cipher is None:
+        master_password = getpass.getpass("New master password: ")
+        if master_password != getpass.getpass("Repeat master password: "):
+            raise ValueError("Master passwords don't match")
+        cipher = VaultCipher(key_file_for(args.vault))
+        cipher.setup(master_password)
+    storage, index = open_vault(args)
+    try:
+        mutations = [("add", cipher.seal(entry)) for entry in index if not is_encrypted(entry["password"])]
+        storage.apply(mutations)
+        # Until the old snapshot and journal lines are rewritten, they still hold the plaintext
+        storage.compact_now()
+    finally:
+        storage.close()
+    # Old passwords kept by change-password would otherwise stay readable
+    sealed = HistoryStore(history_file_for(args.vault)).seal(cipher)
+    print(f"Encrypted {len(mutations):,} passwords and {sealed:,} old versions", file=sys.stderr)
+
+
+def cmd_audit(args):
+    """Report weak and reused passwords"""
+    cipher = unlock_vault(args)
+    storage, index = open_vault(args)
+    storage.close()
+    checker = vault_breach.open_breach_checker(args.breach_db)
+    reveal = (lambda entry: entry["password"]) if cipher is None else cipher.reveal
+    results = vault_audit.VaultAuditor(reveal, checker).audit(index)
+    if checker is not None:
+        checker.close()
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump({"summary": vault_audit.summarize(results), "entries": results}, out, indent=2)
+            out.write("\n")
+        elif args.format == "csv":
+            writer = csv.DictWriter(out, fieldnames=vault_audit.AUDIT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(results)
+        else:
+            summary = vault_audit.summarize(results)
+            out.write(f"{summary['total']} passwords, {summary['weak']} weak, {summary['reused']} reused, "
+                      f"{summary['breached']} breached\n")
+            for result in results:
+                reused = f", reused {result['reused']}x" if result["reused"] else ""
+                breached = ", BREACHED" if result["breached"] else ""
+                out.write(f"{result['strength']:<10} {result['entropy']:>6.1f} bits  "
+                          f"{result['website']} ({result['username']}){reused}{breached}\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def cmd_lookup(args):
+    """Credentials for a URL: exact host, then parent domains, then subdomains"""
+    cipher = unlock_vault(args) if args.show else None
+    storage, index = open_vault(args)
+    storage.close()
+    found = DomainIndex(index).lookup(args.url)
+    for kind in ("exact", "parent", "subdomain"):
+        for entry in found[kind]:
+            line = f"{kind:<10} {entry['website']}  {entry['username']}"
+            if args.show:
+                line += "  " + (entry["password"] if cipher is None else cipher.reveal(entry))
+            print(line)
+
+
+def cmd_change_password(args):
+    """Give one entry a new password, keeping the old one in its history"""
+    cipher = unlock_vault(args)
+    storage, index = open_vault(args)
+    history = HistoryStore(history_file_for(args.vault))
+    try:
+        entry = index.get(args.website, args.username)
+        if entry is None:
+            raise ValueError(f"No saved password for {args.username} on {args.website}")
+        if args.generate:
+            password = password_core.generate_password(password_core.DEFAULT_LENGTH, password_core.FORM_CHARSET)
+        else:
+            password = getpass.getpass("New password: ")
+            if not password:
+                raise ValueError("The new password can't be empty")
+        now = datetime.now().strftime(DATE_FORMAT)
+        new_entry = dict(entry, password=password, date_changed=now)
+        if cipher is not None:
+            new_entry = cipher.seal(new_entry)
+        # History first, so a failed write never loses the old password
+        history.record(entry, now)
+        storage.apply([("add", new_entry)])
+    finally:
+        storage.close()
+        history.close()
+    if args.generate:
+        print(password)
+    print(f"Changed the password for {entry['username']} on {entry['website']}", file=sys.stderr)
+
+
+def cmd_history(args):
+    """Earlier passwords of one entry, newest first"""
+    cipher = unlock_vault(args) if args.show else None
+    for version in HistoryStore(history_file_for(args.vault)).versions(args.website, args.username):
+        password = version["password"] if cipher is None else cipher.reveal(version)
+        line = f"{version['date_added']}  ->  {version['date_changed']}"
+        print(line + "  " + (password if args.show else masked(password)))
+
+
+def cmd_history_prune(args):
+    """Drop history beyond the retention limits"""
+    history = HistoryStore(history_file_for(args.vault), args.keep_versions, args.keep_days)
+    print(f"Dropped {history.prune():,} old versions", file=sys.stderr)
+
+
+def cmd_daemon(args):
+    """Serve the vault to local clients until interrupted"""
+    import vault_daemon
+    print(f"Serving {args.vault} on {args.socket or vault_daemon.default_socket_path()}", file=sys.stderr)
+    vault_daemon.run(args.vault, args.backend, args.socket)
+
+
+def cmd_breach_convert(args):
+    """Build the binary breach database from a text dump"""
+    count = vault_breach.convert_text_dump(args.src, args.dst)
+    print(f"Wrote {count:,} hashes to {args.dst}", file=sys.stderr)
+
+
+def cmd_wordlist_convert(args):
+    """Build the binary passphrase wordlist from a text list"""
+    count = vault_wordlist.convert_wordlist(args.src, args.dst)
+    print(f"Wrote {count:,} words to {args.dst}", file=sys.stderr)
+
+
+def add_vault_arguments(parser):
+    parser.add_argument("--vault", default=default_data_file(), help="vault file (default: %(default)s)")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=["json", "sqlite", "daemon"],
+                        help="storage backend (default: %(default)s)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="✨ Password Vault ✨ command line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="generate passwords")
+    generate.add_argument("-n", "--count", type=int, default=1, help="how many passwords to generate")
+    generate.add_argument("-l", "--length", type=int, default=password_core.DEFAULT_LENGTH,
+                          help=f"password length ({password_core.MIN_LENGTH}-{password_core.MAX_LENGTH})")
+    generate.add_argument("--no-uppercase", action="store_true", help="leave out ABC")
+    generate.add_argument("--no-lowercase", action="store_true", help="leave out abc")
+    generate.add_argument("--no-numbers", action="store_true", help="leave out 123")
+    generate.add_argument("--no-symbols", action="store_true", help="leave out !@#")
+    generate.add_argument("-o", "--output", help="write to this file instead of stdout")
+    generate.add_argument("--unique", action="store_true", help="never repeat a password within the run")
+    generate.add_argument("--shard-dir", help="generate in parallel, one shard file per worker in this directory "
+                                              "(--output then receives the merged result)")
+    generate.add_argument("-j", "--workers", type=int, help="worker processes for --shard-dir (default: all cores)")
+    generate.add_argument("--batch-size", type=int, default=password_core.DEFAULT_BATCH_SIZE,
+                          help="passwords generated per batch")
+    generate.add_argument("-w", "--words", type=int,
+                          help=f"generate passphrases of this many words ({password_core.MIN_WORDS}-"
+                               f"{password_core.MAX_WORDS}) instead of character passwords")
+    generate.add_argument("--separator", default=password_core.DEFAULT_SEPARATOR,
+                          help="between passphrase words (default: %(default)s)")
+    generate.add_argument("--capitalize", default="lower", choices=list(password_core.CAPITALIZATIONS),
+                          help="passphrase word case (default: %(default)s)")
+    generate.add_argument("--wordlist", help="binary wordlist for --words "
+                                             "(default: $PASSWORD_VAULT_WORDLIST or ~/Documents/diceware-words.bin)")
+    generate.set_defaults(func=cmd_generate)
+
+    import_ = subparsers.add_parser("import", help="import a vault, Chrome, Firefox or Bitwarden CSV export")
+    import_.add_argument("path")
+    import_.add_argument("--batch-size", type=int, default=vault_io.IMPORT_BATCH_SIZE,
+                         help="entries written per storage write")
+    add_vault_arguments(import_)
+    import_.set_defaults(func=cmd_import)
+
+    export = subparsers.add_parser("export", help="export the vault to CSV")
+    export.add_argument("path")
+    export.add_argument("--format", default="vault", choices=sorted(vault_io.EXPORT_COLUMNS))
+    add_vault_arguments(export)
+    export.set_defaults(func=cmd_export)
+
+    encrypt = subparsers.add_parser("encrypt", help="protect the vault with a master password")
+    add_vault_arguments(encrypt)
+    encrypt.set_defaults(func=cmd_encrypt)
+
+    audit = subparsers.add_parser("audit", help="find weak and reused passwords")
+    audit.add_argument("--format", default="text", choices=["text", "json", "csv"])
+    audit.add_argument("-o", "--output", help="write the report to this file instead of stdout")
+    audit.add_argument("--breach-db", help="binary breach database to check against "
+                                           "(default: $PASSWORD_VAULT_BREACH_DB or ~/Documents/pwned-passwords.bin)")
+    add_vault_arguments(audit)
+    audit.set_defaults(func=cmd_audit)
+
+    lookup = subparsers.add_parser("lookup", help="find the saved credentials for a URL")
+    lookup.add_argument("url", help="e.g. https://login.example.co.uk/path")
+    lookup.add_argument("--show", action="store_true", help="print the passwords too")
+    add_vault_arguments(lookup)
+    lookup.set_defaults(func=cmd_lookup)
+
+    change = subparsers.add_parser("change-password", help="give an entry a new password, keeping the old one")
+    change.add_argument("website")
+    change.add_argument("username")
+    change.add_argument("--generate", action="store_true", help="generate the new password and print it")
+    add_vault_arguments(change)
+    change.set_defaults(func=cmd_change_password)
+
+    history = subparsers.add_parser("history", help="list an entry's earlier passwords")
+    history.add_argument("website")
+    history.add_argument("username")
+    history.add_argument("--show", action="store_true", help="print the passwords instead of masking them")
+    add_vault_arguments(history)
+    history.set_defaults(func=cmd_history)
+
+    prune = subparsers.add_parser("history-prune", help="drop password history beyond the retention limits")
+    prune.add_argument("--keep-versions", type=int, default=vault_history.KEEP_VERSIONS,
+                       help="versions kept per entry, 0 for all (default: %(default)s)")
+    prune.add_argument("--keep-days", type=int, default=vault_history.KEEP_DAYS,
+                       help="drop versions replaced longer ago than this, 0 for never (default: %(default)s)")
+    add_vault_arguments(prune)
+    prune.set_defaults(func=cmd_history_prune)
+
+    daemon = subparsers.add_parser("daemon", help="keep the vault loaded and serve it over a Unix socket")
+    daemon.add_argument("--socket", help="socket path (default: $PASSWORD_VAULT_SOCKET or a per-user runtime path)")
+    daemon.add_argument("--vault", default=default_data_file(), help="vault file (default: %(default)s)")
+    daemon.add_argument("--backend", default="json" if DEFAULT_BACKEND == "daemon" else DEFAULT_BACKEND,
+                        choices=["json", "sqlite"], help="storage backend the daemon reads and writes")
+    daemon.set_defaults(func=cmd_daemon)
+
+    convert = subparsers.add_parser("breach-convert", help="convert a HIBP-style SHA-1 text dump for offline checks")
+    convert.add_argument("src", help="text dump with one HEX or HEX:COUNT line per hash")
+    convert.add_argument("dst", help="binary database to write")
+    convert.set_defaults(func=cmd_breach_convert)
+
+    words = subparsers.add_parser("wordlist-convert", help="convert a diceware wordlist for passphrase generation")
+    words.add_argument("src", help="text list with one word per line (EFF '11111<TAB>word' lines work too)")
+    words.add_argument("dst", help="binary wordlist to write")
+    words.set_defaults(func=cmd_wordlist_convert)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (ValueError, RuntimeError) as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+import json
+import os
+import secrets
+import time
+
+from vault_index import entry_key
+
+# Forget the derived key after this long without a reveal, copy or save
+KEY_IDLE_SECONDS = 5 * 60
+
+# scrypt cost; derivation runs once per unlock, never per entry
+SCRYPT_N = 2 ** 15
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+TOKEN_PREFIX = "enc1:"
+# Encrypted entries all show the same mask so the length isn't leaked
+ENCRYPTED_MASK = "•" * 10
+
+_CHECK_PLAINTEXT = "password-vault"
+
+
+def is_encrypted(password):
+    """Whether a stored password is an encrypted token"""
+    return password.startswith(TOKEN_PREFIX)
+
+
+def masked(password):
+    """What the Saved tab shows in place of a password"""
+    return ENCRYPTED_MASK if is_encrypted(password) else "•" * len(password)
+
+
+def key_file_for(data_file):
+    """Where the KDF parameters for a vault are kept"""
+    return os.path.splitext(data_file)[0] + ".key.json"
+
+
+def _aesgcm(key):
+    try:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    except ImportError:
+        raise RuntimeError("Encrypted vaults need the 'cryptography' package (pip install cryptography)")
+    return AESGCM(key)
+
+
+def _seal_bytes(aead, data, aad):
+    nonce = secrets.token_bytes(12)
+    return TOKEN_PREFIX + base64.b64encode(nonce + aead.encrypt(nonce, data, aad)).decode()
+
+
+def _open_bytes(aead, token, aad):
+    raw = base64.b64decode(token[len(TOKEN_PREFIX):])
+    return aead.decrypt(raw[:12], raw[12:], aad)
+
+
+def _aad(entry):
+    """Bind each ciphertext to its website/username so tokens can't be swapped"""
+    website, username = entry_key(entry)
+    return f"{website}\n{username}".encode()
+
+
+class VaultCipher:
+    """Master-password derived key for an encrypted vault
+
+    The key file next to the vault holds the scrypt salt and parameters plus
+    an encrypted check value used to reject a wrong master password. The
+    derived key is kept in memory after unlock and dropped after
+    idle_timeout seconds without use. Each entry's password is encrypted on
+    its own with AES-GCM, so reading one never touches the others.
+    """
+
+    def __init__(self, key_file, idle_timeout=KEY_IDLE_SECONDS):
+        self.key_file = key_file
+        self.idle_timeout = idle_timeout
+        self._aead = None
+        self._last_used = 0.0
+        self._params = None
+
+    def enabled(self):
+        """Whether this vault has a master password"""
+        return os.path.exists(self.key_file)
+
+    def _derive(self, master_password, params):
+        return hashlib.scrypt(
+            master_password.encode(),
+            salt=base64.b64decode(params["salt"]),
+            n=params["n"], r=params["r"], p=params["p"],
+            maxmem=256 * 1024 * 1024, dklen=32)
+
+    def setup(self, master_password):
+        """Create the key file for a new master password and unlock with it"""
+        params = {"kdf": "scrypt", "salt": base64.b64encode(secrets.token_bytes(16)).decode(),
+                  "n": SCRYPT_N, "r": SCRYPT_R, "p": SCRYPT_P}
+        self._aead = _aesgcm(self._derive(master_password, params))
+        self._touch()
+        params["check"] = _seal_bytes(self._aead, _CHECK_PLAINTEXT.encode(), b"check")
+        os.makedirs(os.path.dirname(self.key_file) or ".", exist_ok=True)
+        with open(self.key_file, "w") as f:
+            json.dump(params, f, indent=2)
+        self._params = params
+
+    def unlock(self, master_password):
+        """Derive and cache the key, raising ValueError for a wrong master password"""
+        if self._params is None:
+            with open(self.key_file) as f:
+                self._params = json.load(f)
+        aead = _aesgcm(self._derive(master_password, self._params))
+        try:
+            _open_bytes(aead, self._params["check"], b"check")
+        except Exception:
+            raise ValueError("Wrong master password!")
+        self._aead = aead
+        self._touch()
+
+    def is_unlocked(self):
+        """Whether a key is cached; drops it once the idle timeout has passed"""
+        if self._aead is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.lock()
+        return self._aead is not None
+
+    def lock(self):
+        """Forget the derived key"""
+        self._aead = None
+
+    def _touch(self):
+        self._last_used = time.monotonic()
+
+    def seal(self, entry):
+        """Copy of entry with its password encrypted (already encrypted entries are returned as is)"""
+        if is_encrypted(entry["password"]):
+            return entry
+        if not self.is_unlocked():
+            raise RuntimeError("Vault is locked")
+        self._touch()
+        return dict(entry, password=_seal_bytes(self._aead, entry["password"].encode(), _aad(entry)))
+
+    def reveal(self, entry):
+        """Plaintext password of one entry"""
+        if not is_encrypted(entry["password"]):
+            return entry["password"]
+        if not self.is_unlocked():
+            raise RuntimeError("Vault is locked")
+        self._touch()
+        return _open_bytes(self._aead, entry["password"], _aad(entry)).decode()
@@ -0,0 +1,350 @@
+import asyncio
+import json
+import os
+import queue
+import signal
+import socket
+import tempfile
+import threading
+from datetime import datetime
+
+import password_core
+import vault_wordlist
+from vault_crypto import VaultCipher, is_encrypted, key_file_for
+from vault_index import DomainIndex, PasswordIndex, SearchIndex, entry_key
+from vault_records import Record, json_default
+from vault_storage import BackgroundWriter, VaultStorage, open_storage
+import vault_watch
+
+# Where the daemon listens unless told otherwise
+SOCKET_ENV = "PASSWORD_VAULT_SOCKET"
+
+# Upper bounds on one request, so a single client can't stall the others
+MAX_SEARCH_RESULTS = 1000
+MAX_GENERATE = 10000
+# Longest request line accepted, and how many mutations DaemonStorage sends per request to stay under it
+MAX_REQUEST_BYTES = 1024 * 1024
+APPLY_CHUNK = 1000
+
+
+def default_socket_path():
+    """$PASSWORD_VAULT_SOCKET, or a per-user socket in the runtime directory"""
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, f"password-vault-{os.getuid()}.sock")
+
+
+def _text(request, field):
+    """A request field that must be a string"""
+    value = request[field]
+    if not isinstance(value, str):
+        raise ValueError(f"{field} must be a string")
+    return value
+
+
+def _public(entry):
+    """An entry without its password, for results that may list many entries"""
+    return {"website": entry["website"], "username": entry["username"], "date_added": entry["date_added"]}
+
+
+class VaultDaemon:
+    """Serves one vault to local clients over a Unix domain socket
+
+    The vault is loaded once through the normal storage backend and kept in
+    memory with its indexes, so requests never touch the disk. Its own writes
+    go through a BackgroundWriter; entries the Tk app or a script saves to
+    the same JSON vault are merged into the indexes as the files change.
+    The protocol is one JSON object per line
+    each way: {"op": ..., ...} in, {"ok": true, "result": ...} or
+    {"ok": false, "error": ...} out, with any "id" echoed back.
+
+    Requests are handled on the event loop itself; every operation is an
+    in-memory lookup, so there is nothing to gain from threads.
+    """
+
+    def __init__(self, data_file, backend, socket_path=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.storage = open_storage(data_file, backend)
+        # Only used to tell whether the vault has a master password; the daemon never holds the key
+        self.cipher = VaultCipher(key_file_for(data_file))
+        self.writer = BackgroundWriter(self.storage)
+        entries = self.storage.load()["websites"]
+        self.index = PasswordIndex(entries)
+        self.search_index = SearchIndex(self.index)
+        self.domain_index = DomainIndex(self.index)
+        self.requests = 0
+        self._server = None
+        # Opened on the first passphrase request
+        self._wordlist = None
+
+    def handle(self, request):
+        """Run one decoded request and return its result"""
+        op = request.get("op")
+        if op == "ping":
+            return "pong"
+        if op == "get":
+            entry = self.index.get(_text(request, "website"), _text(request, "username"))
+            return None if entry is None else entry.to_dict()
+        if op == "lookup":
+            found = self.domain_index.lookup(_text(request, "url"))
+            return {kind: [entry.to_dict() for entry in entries] for kind, entries in found.items()}
+        if op == "search":
+            # A null limit asks for every match (the Tk app filtering its list)
+            limit = request.get("limit", MAX_SEARCH_RESULTS)
+            return [_public(entry) for entry in self.search_index.search(_text(request, "query"))[:limit]]
+        if op == "list":
+            return [entry.to_dict() for entry in self.index]
+        if op == "apply":
+            return self.apply(request["mutations"])
+        if op == "compact":
+            # Rare (after encrypting), so blocking the loop for the rewrite is fine
+            self.writer.flush()
+            self.storage.compact_now()
+            return None
+        if op == "generate":
+            count = int(request.get("count", 1))
+            if not 1 <= count <= MAX_GENERATE:
+                raise ValueError(f"count must be between 1 and {MAX_GENERATE}")
+            if request.get("words"):
+                return password_core.generate_passphrase_batch(
+                    count, self.wordlist(), int(request["words"]),
+                    request.get("separator", password_core.DEFAULT_SEPARATOR),
+                    request.get("capitalize", "lower"))
+            chars = password_core.build_charset(
+                uppercase=request.get("uppercase", True),
+                lowercase=request.get("lowercase", True),
+                numbers=request.get("numbers", True),
+                symbols=request.get("symbols", True),
+            )
+            return password_core.generate_batch(count, int(request.get("length", password_core.DEFAULT_LENGTH)), chars)
+        raise ValueError(f"Unknown request: {op}")
+
+    def wordlist(self):
+        """The passphrase wordlist, opened on first use"""
+        if self._wordlist is None:
+            self._wordlist = vault_wordlist.open_wordlist()
+            if self._wordlist is None:
+                raise ValueError(f"No wordlist at {vault_wordlist.default_wordlist_file()}")
+        return self._wordlist
+
+    def apply(self, mutations):
+        """Update the indexes and queue the writes, returning how many were applied"""
+        try:
+            error = self.writer.errors.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            raise RuntimeError(f"Could not save an earlier change: {error}")
+        # Check the whole batch first, so a bad item can't leave earlier ones applied but unsaved
+        checked = []
+        encrypted = self.cipher.enabled()
+        for op, entry in mutations:
+            if not isinstance(entry, dict):
+                raise ValueError("Mutation entries must be JSON objects")
+            if op == "add":
+                if encrypted and not is_encrypted(entry["password"]):
+                    # The daemon can't seal without the master key, and won't store plaintext
+                    raise ValueError("This vault is encrypted; seal passwords before adding them")
+                if not entry.get("date_added"):
+                    entry = dict(entry, date_added=datetime.now().strftime("%Y-%m-%d %H:%M"))
+                entry = Record.from_dict(entry)
+            elif op == "delete":
+                entry = {"website": _text(entry, "website"), "username": _text(entry, "username")}
+            else:
+                raise ValueError(f"Unknown vault mutation: {op}")
+            checked.append((op, entry))
+
+        queued = []
+        for op, entry in checked:
+            existing = self.index.get(entry["website"], entry["username"])
+            if existing is not None:
+                self._forget(existing)
+            elif op == "delete":
+                continue
+            if op == "add":
+                self.index.add(entry)
+                self.search_index.add(entry)
+                self.domain_index.add(entry)
+            queued.append((op, entry))
+        self.writer.submit(*queued)
+        return len(queued)
+
+    def merge(self, changes):
+        """Bring the indexes up to date with mutations another process saved"""
+        for op, entry in changes:
+            existing = self.index.get(entry.website, entry.username)
+            if existing is not None:
+                self._forget(existing)
+            if op == "add":
+                self.index.add(entry)
+                self.search_index.add(entry)
+                self.domain_index.add(entry)
+
+    def _forget(self, entry):
+        self.index.remove(*entry_key(entry))
+        self.search_index.remove(entry)
+        self.domain_index.remove(entry)
+
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_REQUEST_BYTES; the stream can't be resynchronized
+                    break
+                if not line:
+                    break
+                self.requests += 1
+                request = {}
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Requests must be JSON objects")
+                    response = {"ok": True, "result": self.handle(request)}
+                except Exception as e:
+                    # However a malformed request breaks, answer it rather than drop the connection
+                    response = {"ok": False, "error": str(e) or type(e).__name__}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+                writer.write(json.dumps(response, default=json_default).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _claim_socket(self):
+        """Remove a stale socket file, refusing to start if a daemon is already listening"""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.remove(self.socket_path)
+        else:
+            raise RuntimeError(f"A vault daemon is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def serve(self):
+        """Listen until SIGINT/SIGTERM, then flush writes and remove the socket"""
+        self._claim_socket()
+        # Only this user may connect
+        old_umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._serve_client, self.socket_path, limit=MAX_REQUEST_BYTES)
+        finally:
+            os.umask(old_umask)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        def on_change():
+            # Read on the watcher thread, merge on the event loop
+            try:
+                changes = self.storage.refresh()
+            except OSError:
+                return
+            if changes:
+                loop.call_soon_threadsafe(self.merge, changes)
+
+        watch_paths = self.storage.watch_paths()
+        watcher = vault_watch.watch(watch_paths, on_change) if watch_paths else None
+        try:
+            async with self._server:
+                await stop.wait()
+        finally:
+            if watcher is not None:
+                watcher.stop()
+            self.writer.close()
+            if self._wordlist is not None:
+                self._wordlist.close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+def run(data_file, backend, socket_path=None):
+    """Load the vault and serve it until interrupted"""
+    daemon = VaultDaemon(data_file, backend, socket_path)
+    asyncio.run(daemon.serve())
+
+
+class VaultClient:
+    """Blocking client for the vault daemon, safe to share between threads"""
+
+    def __init__(self, socket_path=None, timeout=30):
+        self.socket_path = socket_path or default_socket_path()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        try:
+            self._sock.connect(self.socket_path)
+        except OSError:
+            self._sock.close()
+            raise RuntimeError(f"No vault daemon is listening on {self.socket_path} (start one with vault_cli.py daemon)")
+        self._file = self._sock.makefile("rb")
+        self._lock = threading.Lock()
+
+    def request(self, op, **params):
+        """Send one request and return its result, raising RuntimeError if the daemon refused it"""
+        data = json.dumps(dict(params, op=op), default=json_default).encode() + b"\n"
+        with self._lock:
+            self._sock.sendall(data)
+            line = self._file.readline()
+        if not line:
+            raise RuntimeError("The vault daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def get(self, website, username):
+        return self.request("get", website=website, username=username)
+
+    def lookup(self, url):
+        return self.request("lookup", url=url)
+
+    def search(self, query, limit=MAX_SEARCH_RESULTS):
+        return self.request("search", query=query, limit=limit)
+
+    def generate(self, count=1, length=password_core.DEFAULT_LENGTH, **options):
+        """Character passwords, or passphrases when options include words=N"""
+        return self.request("generate", count=count, length=length, **options)
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+
+class DaemonStorage(VaultStorage):
+    """Storage backend that reads and writes through a running vault daemon
+
+    Lets the Tk app share the vault with scripts instead of racing them for
+    the file. Searches run in the daemon too.
+    """
+
+    supports_search = True
+
+    def __init__(self, socket_path=None):
+        self.client = VaultClient(socket_path)
+
+    def load(self):
+        return {"websites": [Record.from_dict(entry) for entry in self.client.request("list")]}
+
+    def apply(self, mutations):
+        mutations = [[op, entry] for op, entry in mutations]
+        for start in range(0, len(mutations), APPLY_CHUNK):
+            self.client.request("apply", mutations=mutations[start:start + APPLY_CHUNK])
+
+    def search(self, query):
+        return [(entry["website"], entry["username"]) for entry in self.client.search(query, limit=None)]
+
+    def compact_now(self):
+        self.client.request("compact")
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# Set to a file path to write a JSON report of the metrics when the app closes
+DIAGNOSTICS_ENV = "PASSWORD_VAULT_DIAGNOSTICS"
+# Set to a file path to profile the Tk thread with cProfile (pstats format)
+PROFILE_ENV = "PASSWORD_VAULT_PROFILE"
+
+# Histogram bucket upper bounds in ms; the last bucket catches everything slower
+BUCKET_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# How often the event loop is checked, and how late a check must be to count as a stall
+STALL_CHECK_MS = 100
+STALL_THRESHOLD_MS = 200
+
+
+class Histogram:
+    """Count, total, max and fixed log-spaced buckets for one timing"""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (the max for the last bucket)"""
+        if not self.count:
+            return 0.0
+        wanted = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKET_BOUNDS_MS, self.buckets):
+            seen += n
+            if seen >= wanted:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max, 3),
+            "buckets": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class Metrics:
+    """Counters and latency histograms, cheap enough to leave on
+
+    Recording a timing costs two perf_counter calls, a lock and a bisect,
+    so hot paths are instrumented unconditionally. Safe to use from the
+    loader and writer threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._timings = {}
+
+    def incr(self, name, n=1):
+        """Add n to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name, ms):
+        """Record one timing in milliseconds"""
+        with self._lock:
+            histogram = self._timings.get(name)
+            if histogram is None:
+                histogram = self._timings[name] = Histogram()
+            histogram.add(ms)
+
+    @contextmanager
+    def timer(self, name):
+        """Time the body of a with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name):
+        """Decorator recording every call of a function under name"""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        """Plain dict copy of every counter and timing"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "timings": {name: histogram.to_dict() for name, histogram in sorted(self._timings.items())},
+            }
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+
+# Shared by every module so one report covers the whole app
+metrics = Metrics()
+
+
+class StallDetector:
+    """Notices when the Tk event loop can't run callbacks on time
+
+    A check is scheduled every interval_ms; how late it actually runs is
+    how long the event loop was blocked. Checks later than threshold_ms
+    are recorded as stalls.
+    """
+
+    def __init__(self, root, interval_ms=STALL_CHECK_MS, threshold_ms=STALL_THRESHOLD_MS, metrics=metrics):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.metrics = metrics
+        self._after_id = None
+        self._expected = None
+
+    def start(self):
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._check)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _check(self):
+        late = (time.perf_counter() - self._expected) * 1000
+        if late > self.threshold_ms:
+            self.metrics.incr("event_loop.stalls")
+            self.metrics.observe("event_loop.stall", late)
+        self.start()
+
+
+def build_report(extra=None):
+    """Metrics snapshot plus enough context to read it in a bug report"""
+    import platform
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    report.update(extra or {})
+    report.update(metrics.snapshot())
+    return report
+
+
+def write_report(path, extra=None):
+    """Write the JSON diagnostics report to path"""
+    with open(path, "w") as f:
+        json.dump(build_report(extra), f, indent=2)
+        f.write("\n")
+
+
+def start_profiler():
+    """Start cProfile on this thread if PASSWORD_VAULT_PROFILE is set"""
+    if not os.environ.get(PROFILE_ENV):
+        return None
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def finish(profiler=None, extra=None):
+    """Write whatever the environment asked for when the app closes"""
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(os.environ[PROFILE_ENV])
+    path = os.environ.get(DIAGNOSTICS_ENV)
+    if path:
+        write_report(path, extra)
@@ -0,0 +1,177 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from vault_index import entry_key, normalize_key
+from vault_storage import FileLock
+
+# Retention: versions kept per entry, and the age in days after which a
+# version is dropped whatever the count (0 means no limit for either)
+KEEP_VERSIONS = int(os.environ.get("PASSWORD_VAULT_HISTORY_VERSIONS", "10"))
+KEEP_DAYS = int(os.environ.get("PASSWORD_VAULT_HISTORY_DAYS", "0"))
+
+# Versions recorded before the history file is pruned again in the background
+PRUNE_EVERY = 50
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def history_file_for(data_file):
+    """Where the old versions of a vault's entries are kept"""
+    return os.path.splitext(data_file)[0] + ".history"
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class HistoryStore:
+    """Previous passwords of vault entries, kept apart from the vault itself
+
+    Changing a password appends one JSON line to password_vault.history
+    holding just the replaced password and two dates: date_added (when that
+    password was set) and date_changed (when it was replaced). The vault's
+    snapshot and journal never carry history, so loading and searching
+    don't pay for it, and nothing here is read until versions() is first
+    called. prune() rewrites the file within the retention limits; it runs
+    on a background thread.
+    """
+
+    def __init__(self, path, keep_versions=KEEP_VERSIONS, keep_days=KEEP_DAYS):
+        self.path = path
+        self.keep_versions = keep_versions
+        self.keep_days = keep_days
+        # Other processes append here too, so every read and write takes the lock
+        self.lock = FileLock(path + ".lock")
+        self.prune_error = None
+        self._versions = None    # index key -> versions, oldest first; None until first read
+        self._stamp = None
+        self._recorded = 0
+        self._pruner = None
+
+    def record(self, entry, changed):
+        """Keep entry's current password as a version replaced at changed"""
+        version = {
+            "website": entry["website"],
+            "username": entry["username"],
+            "password": entry["password"],
+            # The entry's own password was set when it last changed, or when it was added
+            "date_added": entry.get("date_changed") or entry["date_added"],
+            "date_changed": changed,
+        }
+        with self.lock.held():
+            current = self._stamp == _stamp(self.path)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a+b") as f:
+                line = json.dumps(version).encode() + b"\n"
+                if f.tell():
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        # Don't glue this version onto a line torn by a crash
+                        line = b"\n" + line
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if self._versions is not None and current:
+                self._versions.setdefault(entry_key(entry), []).append(version)
+                self._stamp = _stamp(self.path)
+            self._recorded += 1
+        if self._recorded >= PRUNE_EVERY:
+            self.start_pruning()
+
+    def versions(self, website, username):
+        """Earlier versions of an entry, newest first"""
+        with self.lock.held():
+            if self._versions is None or self._stamp != _stamp(self.path):
+                # First look, or another process changed the file since
+                self._stamp = _stamp(self.path)
+                self._versions = self._read()
+            return list(reversed(self._versions.get(normalize_key(website, username), [])))
+
+    def _read(self):
+        versions = {}
+        if not os.path.exists(self.path):
+            return versions
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    version = json.loads(line)
+                except ValueError:
+                    continue
+                versions.setdefault(entry_key(version), []).append(version)
+        return versions
+
+    def prune(self):
+        """Drop versions beyond the retention limits, returning how many were dropped"""
+        cutoff = None
+        if self.keep_days:
+            cutoff = (datetime.now() - timedelta(days=self.keep_days)).strftime(DATE_FORMAT)
+        with self.lock.held():
+            versions = self._read()
+            dropped = 0
+            for key, kept in list(versions.items()):
+                if cutoff is not None:
+                    kept = [version for version in kept if version["date_changed"] >= cutoff]
+                if self.keep_versions:
+                    kept = kept[-self.keep_versions:]
+                dropped += len(versions[key]) - len(kept)
+                if kept:
+                    versions[key] = kept
+                else:
+                    del versions[key]
+            if dropped:
+                self._write(versions)
+            self._recorded = 0
+        return dropped
+
+    def seal(self, cipher):
+        """Encrypt every stored password with cipher, returning how many were sealed"""
+        with self.lock.held():
+            versions = self._read()
+            sealed = 0
+            for key, kept in versions.items():
+                # seal() leaves already encrypted versions as they are
+                versions[key] = [cipher.seal(version) for version in kept]
+                sealed += sum(new is not old for new, old in zip(versions[key], kept))
+            if sealed:
+                self._write(versions)
+        return sealed
+
+    def _write(self, versions):
+        """Replace the file with versions (called with the lock held)"""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for kept in versions.values():
+                for version in kept:
+                    f.write(json.dumps(version) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if self._versions is not None:
+            self._versions = versions
+            self._stamp = _stamp(self.path)
+
+    def start_pruning(self):
+        """Prune on a background thread unless a prune is already running"""
+        if self._pruner is not None and self._pruner.is_alive():
+            return
+        self._pruner = threading.Thread(target=self._prune_in_background, daemon=True)
+        self._pruner.start()
+
+    def _prune_in_background(self):
+        try:
+            self.prune()
+            self.prune_error = None
+        except OSError as e:
+            # Nothing is lost; the file is just longer than it needs to be
+            self.prune_error = e
+
+    def close(self):
+        """Wait for a running prune to finish"""
+        if self._pruner is not None:
+            self._pruner.join()
@@ -0,0 +1,440 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+
+# Search results smaller than this fraction of the vault are sorted directly;
+# bigger ones are picked out of the column's full sorted order
+SUBSET_SORT_FRACTION = 0.1
+
+
+def normalize_key(website, username):
+    """Build the index key for a website/username pair"""
+    # Treeview hands back numeric-looking values as ints, so coerce first
+    return (str(website).strip().lower(), str(username).strip().lower())
+
+
+def entry_key(entry):
+    """Index key for a stored password entry"""
+    return normalize_key(entry["website"], entry["username"])
+
+
+class PasswordIndex:
+    """Insertion-ordered index of password entries keyed on website + username"""
+
+    def __init__(self, entries=()):
+        self._entries = {}
+        self.load(entries)
+
+    def load(self, entries):
+        """Rebuild the index from a list of entries (the first duplicate wins)"""
+        self._entries = {}
+        for entry in entries:
+            self._entries.setdefault(entry_key(entry), entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def get(self, website, username):
+        """Return the entry for a website/username pair, or None"""
+        return self._entries.get(normalize_key(website, username))
+
+    def add(self, entry):
+        """Add an entry, returning False if the website/username already exists"""
+        key = entry_key(entry)
+        if key in self._entries:
+            return False
+        self._entries[key] = entry
+        return True
+
+    def remove(self, website, username):
+        """Remove and return the entry for a website/username pair, or None"""
+        return self._entries.pop(normalize_key(website, username), None)
+
+    def items(self):
+        """(index key, entry) pairs in insertion order"""
+        return self._entries.items()
+
+    def to_list(self):
+        """Entries in insertion order, ready to be written to the vault file"""
+        return list(self._entries.values())
+
+
+def matches(entry, query):
+    """Whether a lowercased query appears in an entry's website or username"""
+    return query in f"{entry['website']}\n{entry['username']}".lower()
+
+
+def _trigrams(text):
+    """Distinct three-character slices of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over the lowercased website and username of each entry
+
+    Posting lists are append-only arrays of document ids, so they stay in
+    insertion order. Removed documents are dropped lazily and the postings
+    are rebuilt once more than half of them are dead.
+    """
+
+    def __init__(self, entries=()):
+        self._docs = {}      # doc id -> (search text, entry)
+        self._ids = {}       # index key -> doc id
+        self._grams = {}     # trigram -> array of doc ids
+        self._next_id = 0
+        self._dead = 0
+        self._last_query = None
+        self._last_results = None
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, entry):
+        """Index an entry, replacing any entry with the same website/username"""
+        key = entry_key(entry)
+        if key in self._ids:
+            self.remove(entry)
+        doc_id = self._next_id
+        self._next_id += 1
+        text = f"{entry['website']}\n{entry['username']}".lower()
+        self._docs[doc_id] = (text, entry)
+        self._ids[key] = doc_id
+        for gram in _trigrams(text):
+            postings = self._grams.get(gram)
+            if postings is None:
+                postings = self._grams[gram] = array("L")
+            postings.append(doc_id)
+        self._last_query = None
+
+    def remove(self, entry):
+        """Drop an entry from the index"""
+        doc_id = self._ids.pop(entry_key(entry), None)
+        if doc_id is None:
+            return
+        del self._docs[doc_id]
+        self._dead += 1
+        self._last_query = None
+        if self._dead > len(self._docs):
+            self._compact()
+
+    def _compact(self):
+        """Rebuild the posting lists without dead document ids"""
+        self._grams = {}
+        for doc_id, (text, _) in self._docs.items():
+            for gram in _trigrams(text):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    postings = self._grams[gram] = array("L")
+                postings.append(doc_id)
+        self._dead = 0
+
+    def _candidates(self, query):
+        """Doc ids that may contain query, in insertion order"""
+        if len(query) < 3:
+            return self._docs.keys()
+        smallest = None
+        for gram in _trigrams(query):
+            postings = self._grams.get(gram)
+            if postings is None:
+                return ()
+            if smallest is None or len(postings) < len(smallest):
+                smallest = postings
+        return smallest
+
+    def search(self, query):
+        """Entries whose website or username contains query, in insertion order"""
+        query = query.lower()
+        if not query:
+            results = [entry for _, entry in self._docs.values()]
+        elif self._last_query and self._last_query in query:
+            # The query was refined, so only the previous matches can still match
+            results = [entry for entry in self._last_results if matches(entry, query)]
+        else:
+            docs = self._docs
+            results = []
+            for doc_id in self._candidates(query):
+                doc = docs.get(doc_id)
+                if doc is not None and query in doc[0]:
+                    results.append(doc[1])
+        self._last_query = query
+        self._last_results = results
+        return results
+
+
+def _website_order(key, entry):
+    return key
+
+
+def _username_order(key, entry):
+    return (key[1], key[0])
+
+
+def _date_order(key, entry):
+    # Records carry the date packed into a sortable int already
+    added = getattr(entry, "added", None)
+    if added is None:
+        # Imported here since vault_records depends on this module (through vault_crypto)
+        from vault_records import pack_date
+        added = pack_date(entry.get("date_added") or "")
+    # Dates that didn't parse sort as the oldest
+    return (added if isinstance(added, int) else -1, key)
+
+
+# Sort key for each sortable Saved tab column, built from an entry's index key
+# and the entry. Keys contain the index key, so no two entries share one and an
+# entry can be found again by bisecting.
+SORT_KEYS = {"website": _website_order, "username": _username_order, "date_added": _date_order}
+
+
+def sort_key(column, entry):
+    """An entry's sort key for a column"""
+    return SORT_KEYS[column](entry_key(entry), entry)
+
+
+class SortIndex:
+    """Entries of a PasswordIndex kept sorted by each column, keys computed once
+
+    A column's order is built the first time it is asked for (a full sort,
+    seconds at a million entries), then kept current, so switching the sort
+    of a large vault never re-sorts it. Orders are only kept for columns
+    that have been sorted by.
+
+    Added entries wait until an order is next needed and are then merged
+    in with one linear pass per order, so loading or importing in batches
+    costs nothing here until the list is redrawn.
+    """
+
+    def __init__(self, index):
+        self._index = index
+        self._orders = {}    # column -> (sorted keys, entries in the same order)
+        self._pending = {}   # id(entry) -> entry added since the orders were last merged
+
+    def order(self, column):
+        """Every entry in ascending column order (a shared list; don't modify it)"""
+        self._merge_pending()
+        built = self._orders.get(column)
+        if built is None:
+            order_key = SORT_KEYS[column]
+            built = self._orders[column] = self._build(
+                (order_key(key, entry), entry) for key, entry in self._index.items())
+        return built[1]
+
+    @staticmethod
+    def _build(pairs):
+        pairs = sorted(pairs, key=itemgetter(0))
+        return [key for key, _ in pairs], [entry for _, entry in pairs]
+
+    def add(self, entries):
+        """Add new entries to every order built so far, once one is next needed"""
+        if self._orders:
+            self._pending.update((id(entry), entry) for entry in entries)
+
+    def _merge_pending(self):
+        """Merge the waiting entries into each order: sort them, then one pass over the order"""
+        if not self._pending:
+            return
+        entries = list(self._pending.values())
+        self._pending = {}
+        for column, (keys, ordered) in list(self._orders.items()):
+            new = sorted(((sort_key(column, entry), entry) for entry in entries), key=itemgetter(0))
+            merged_keys, merged = [], []
+            start = 0
+            for k, entry in new:
+                i = bisect_right(keys, k, start)
+                merged_keys.extend(keys[start:i])
+                merged.extend(ordered[start:i])
+                merged_keys.append(k)
+                merged.append(entry)
+                start = i
+            merged_keys.extend(keys[start:])
+            merged.extend(ordered[start:])
+            self._orders[column] = (merged_keys, merged)
+
+    def remove(self, entry):
+        """Drop an entry from every order built so far"""
+        if self._pending.pop(id(entry), None) is not None:
+            # Never merged, so no order holds it
+            return
+        for column, (keys, ordered) in self._orders.items():
+            k = sort_key(column, entry)
+            i = bisect_left(keys, k)
+            if i < len(keys) and keys[i] == k:
+                del keys[i]
+                del ordered[i]
+
+    def sort(self, entries, column, descending=False):
+        """A new list of entries (the whole index or a search's results) sorted by column"""
+        self._merge_pending()
+        if entries is self._index:
+            rows = list(self.order(column))
+        elif len(entries) < len(self._index) * SUBSET_SORT_FRACTION:
+            rows = sorted(entries, key=lambda entry: sort_key(column, entry))
+        else:
+            wanted = {id(entry) for entry in entries}
+            rows = [entry for entry in self.order(column) if id(entry) in wanted]
+        if descending:
+            rows.reverse()
+        return rows
+
+
+def sorted_position(rows, entry, column, descending=False):
+    """Where entry belongs in rows already sorted by column"""
+    target = sort_key(column, entry)
+    lo, hi = 0, len(rows)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        k = sort_key(column, rows[mid])
+        if (k > target) if descending else (k < target):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+# Public suffixes made of two labels, so example.co.uk is registrable but co.uk
+# isn't. A short list of the common ones rather than the full Public Suffix List.
+MULTI_LABEL_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.jp", "ne.jp", "or.jp", "co.kr", "co.in", "co.za",
+    "com.br", "com.mx", "com.ar", "com.cn", "com.tw", "com.hk", "com.sg", "com.tr",
+})
+
+
+def canonical_host(website):
+    """Lowercase host name of a stored website or URL, without www., or None
+
+    'https://www.Example.com:443/login' and 'example.com' both give
+    'example.com'. Free-form names that aren't host names ('My Bank') give None.
+    """
+    host = str(website).strip().lower()
+    if "://" in host:
+        host = host.split("://", 1)[1]
+    for sep in "/?#":
+        host = host.split(sep, 1)[0]
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0].rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    labels = host.split(".")
+    if len(labels) < 2 or not all(labels) or any(c.isspace() for c in host):
+        return None
+    return host
+
+
+def registrable_domain(host):
+    """The part of a canonical host a site owner registers: login.example.co.uk -> example.co.uk"""
+    labels = host.split(".")
+    if labels[-1].isdigit():
+        # An IP address is its own domain
+        return host
+    keep = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-keep:])
+
+
+class _DomainNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = {}    # index key -> entry stored for exactly this host
+
+
+class DomainIndex:
+    """Reverse-label trie of canonical hosts for URL lookups
+
+    login.example.co.uk is stored under uk -> co -> example -> login, so
+    every host sharing a domain shares a path. A lookup walks one node per
+    label of the URL's host, so its cost depends on the URL and the number
+    of matches, never on the size of the vault. Entries whose website isn't
+    a host name are not indexed.
+    """
+
+    def __init__(self, entries=()):
+        self._root = _DomainNode()
+        self._hosts = {}     # index key -> canonical host it is stored under
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self._hosts)
+
+    def add(self, entry):
+        """Index an entry, replacing any entry with the same website/username"""
+        key = entry_key(entry)
+        if key in self._hosts:
+            self.remove(entry)
+        host = canonical_host(entry["website"])
+        if host is None:
+            return
+        node = self._root
+        for label in reversed(host.split(".")):
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _DomainNode()
+            node = child
+        node.entries[key] = entry
+        self._hosts[key] = host
+
+    def remove(self, entry):
+        """Drop an entry from the index, pruning branches left empty"""
+        key = entry_key(entry)
+        host = self._hosts.pop(key, None)
+        if host is None:
+            return
+        path = [self._root]
+        for label in reversed(host.split(".")):
+            path.append(path[-1].children[label])
+        del path[-1].entries[key]
+        labels = host.split(".")
+        for depth in range(len(labels), 0, -1):
+            node = path[depth]
+            if node.entries or node.children:
+                break
+            del path[depth - 1].children[labels[len(labels) - depth]]
+
+    def lookup(self, url):
+        """Entries for a URL's host, grouped as exact, parent-domain and subdomain matches
+
+        Parents are the hosts between the URL's host and its registrable
+        domain, nearest first; login.example.co.uk finds example.co.uk but
+        never co.uk. Subdomains are every host below the URL's host.
+        """
+        found = {"exact": [], "parent": [], "subdomain": []}
+        host = canonical_host(url)
+        if host is None:
+            return found
+        labels = host.split(".")
+        floor = len(registrable_domain(host).split("."))
+        node = self._root
+        parents = []
+        for depth, label in enumerate(reversed(labels), 1):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if depth == len(labels):
+                found["exact"].extend(node.entries.values())
+                stack = list(node.children.values())
+                while stack:
+                    below = stack.pop()
+                    found["subdomain"].extend(below.entries.values())
+                    stack.extend(below.children.values())
+            elif depth >= floor:
+                parents.append(node)
+        for parent in reversed(parents):
+            found["parent"].extend(parent.entries.values())
+        return found
+
+    def search(self, url):
+        """Entries for a URL, best match first: exact host, then parent domains, then subdomains"""
+        found = self.lookup(url)
+        return found["exact"] + found["parent"] + found["subdomain"]
+
+
+def is_url_query(query):
+    """Whether a search box query is a pasted URL rather than text to match"""
+    return "://" in query
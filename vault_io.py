@@ -0,0 +1,114 @@
+import csv
+from datetime import datetime
+from urllib.parse import urlsplit
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Entries handed to storage in one write while importing
+IMPORT_BATCH_SIZE = 1000
+
+# Columns that identify each CSV export we can read, checked in this order
+IMPORT_FORMATS = {
+    "vault": {"website", "username", "password"},
+    "bitwarden": {"login_uri", "login_username", "login_password"},
+    "firefox": {"url", "username", "password", "timeCreated"},
+    "chrome": {"url", "username", "password"},
+}
+
+EXPORT_COLUMNS = {
+    "vault": ["website", "username", "password", "date_added"],
+    "chrome": ["name", "url", "username", "password", "note"],
+}
+
+
+def detect_format(header):
+    """Name of the export format whose required columns are all in header"""
+    columns = set(header)
+    for name, needed in IMPORT_FORMATS.items():
+        if needed <= columns:
+            return name
+    raise ValueError("Unrecognized CSV columns: " + ", ".join(header))
+
+
+def _site(url, fallback=""):
+    """Website name for a browser URL (github.com for https://github.com/login)"""
+    host = urlsplit(url if "://" in url else "https://" + url).hostname if url else None
+    return host or fallback or url
+
+
+def row_to_entry(row, fmt):
+    """Convert one CSV row into a vault entry, or None if it has no credentials"""
+    if fmt == "vault":
+        website, username, password = row["website"], row["username"], row["password"]
+        date_added = row.get("date_added") or ""
+    elif fmt == "bitwarden":
+        if row.get("type", "login") != "login":
+            return None
+        website = _site(row["login_uri"], row.get("name", ""))
+        username, password = row["login_username"], row["login_password"]
+        date_added = ""
+    else:
+        website = _site(row["url"], row.get("name", ""))
+        username, password = row["username"], row["password"]
+        date_added = ""
+        created = row.get("timeCreated")
+        if created and created.isdigit():
+            # Firefox stores milliseconds since the epoch
+            date_added = datetime.fromtimestamp(int(created) / 1000).strftime(DATE_FORMAT)
+
+    website, username, password = (website or "").strip(), (username or "").strip(), (password or "").strip()
+    if not (website and username and password):
+        return None
+    return {
+        "website": website,
+        "username": username,
+        "password": password,
+        "date_added": date_added or datetime.now().strftime(DATE_FORMAT),
+    }
+
+
+def iter_import_batches(path, batch_size=IMPORT_BATCH_SIZE):
+    """Read a CSV export incrementally, yielding lists of entries
+
+    Rows without a website, username and password are skipped. Nothing is
+    deduplicated here; that happens against the vault index when the batch
+    is applied.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        fmt = detect_format(reader.fieldnames or [])
+        batch = []
+        for row in reader:
+            entry = row_to_entry(row, fmt)
+            if entry is not None:
+                batch.append(entry)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+
+def add_new_entries(index, entries):
+    """Add entries not already in the index, returning the ones that were added"""
+    return [entry for entry in entries if index.add(entry)]
+
+
+def export_csv(entries, path, fmt="vault"):
+    """Write entries to a CSV file in one of the known formats, row by row"""
+    if fmt not in EXPORT_COLUMNS:
+        raise ValueError(f"Can't export to {fmt} format")
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS[fmt])
+        for entry in entries:
+            if fmt == "vault":
+                writer.writerow([entry["website"], entry["username"], entry["password"], entry["date_added"]])
+            else:
+                url = entry["website"]
+                if not url.startswith(("http://", "https://")):
+                    url = "https://" + url
+                writer.writerow([entry["website"], url, entry["username"], entry["password"], ""])
+            count += 1
+    return count
@@ -0,0 +1,111 @@
+import sys
+
+from vault_crypto import masked
+
+FIELDS = ("website", "username", "password", "date_added")
+
+# One shared mask string per password length (and one for encrypted entries)
+_MASKS = {}
+
+
+def pack_date(text):
+    """'2024-05-01 13:45' as the int 202405011345; anything else is kept as is"""
+    # text[4::3] picks out the four separators of a well-formed date
+    if len(text) == 16 and text[4::3] == "-- :":
+        digits = text[:4] + text[5:7] + text[8:10] + text[11:13] + text[14:]
+        # isdigit() alone accepts digits like "²" that int() rejects
+        if digits.isascii() and digits.isdigit():
+            return int(digits)
+    return text
+
+
+def unpack_date(value):
+    """Inverse of pack_date"""
+    if isinstance(value, str):
+        return value
+    digits = f"{value:012d}"
+    return f"{digits[:4]}-{digits[4:6]}-{digits[6:8]} {digits[8:10]}:{digits[10:]}"
+
+
+def _mask(password):
+    mask = masked(password)
+    return _MASKS.setdefault(mask, mask)
+
+
+class Record:
+    """One vault entry, stored in slots instead of a dict
+
+    Reads like the dict it replaces (record["website"], keys(), get(), and
+    dict(record, password=...) all work), so code written against the JSON
+    schema doesn't change. Website names are interned, the date is packed
+    into an int and the Saved tab's mask is computed once and shared
+    between passwords of the same length. Keys outside the schema are kept
+    in extra so nothing is lost when the vault is written back.
+    """
+
+    __slots__ = ("website", "username", "password", "added", "mask", "extra")
+
+    def __init__(self, website, username, password, date_added="", extra=None):
+        self.website = sys.intern(website)
+        self.username = username
+        self.password = password
+        self.added = pack_date(date_added)
+        self.mask = _mask(password)
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Record for an entry dict (records are returned unchanged)"""
+        if isinstance(entry, cls):
+            return entry
+        extra = None
+        if len(entry) > 4 or "date_added" not in entry:
+            extra = {key: value for key, value in entry.items() if key not in FIELDS}
+        return cls(entry["website"], entry["username"], entry["password"], entry.get("date_added") or "", extra)
+
+    @property
+    def date_added(self):
+        return unpack_date(self.added)
+
+    def to_dict(self):
+        """The entry in the password_vault.json schema"""
+        entry = {"website": self.website, "username": self.username,
+                 "password": self.password, "date_added": self.date_added}
+        if self.extra:
+            entry.update(self.extra)
+        return entry
+
+    def keys(self):
+        return FIELDS + tuple(self.extra) if self.extra else FIELDS
+
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in FIELDS or bool(self.extra and key in self.extra)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __repr__(self):
+        return f"Record({self.website!r}, {self.username!r})"
+
+
+def json_default(obj):
+    """json.dump hook that writes records in the vault schema"""
+    if isinstance(obj, Record):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,621 @@
+import argparse
+import json
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # Windows locks through msvcrt instead
+    fcntl = None
+    import msvcrt
+
+from vault_diagnostics import metrics
+from vault_index import entry_key, normalize_key
+from vault_records import Record, json_default
+
+# Journal size that triggers a background snapshot
+JOURNAL_COMPACT_BYTES = 1024 * 1024
+
+# How long the writer waits for a burst of mutations to finish before writing
+WRITE_COALESCE_SECONDS = 0.2
+
+# "json" (snapshot + journal), "sqlite", or "daemon" (through a running vault daemon)
+DEFAULT_BACKEND = os.environ.get("PASSWORD_VAULT_BACKEND", "json")
+
+
+def default_data_file():
+    """The vault lives in the user's Documents folder rather than next to the app"""
+    return os.path.join(os.path.expanduser("~/Documents"), "password_vault.json")
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def _inode(path):
+    """(device, inode) naming a journal file across renames, or None if it doesn't exist"""
+    st = _stat(path)
+    return None if st is None else (st.st_dev, st.st_ino)
+
+
+def _stamp(path):
+    """Changes whenever a snapshot is replaced, or None if there is none"""
+    st = _stat(path)
+    return None if st is None else (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _same_entry(a, b):
+    return (a.password == b.password and a.added == b.added and a.website == b.website
+            and a.username == b.username and a.extra == b.extra)
+
+
+class FileLock:
+    """Advisory exclusive lock on a file next to the vault
+
+    flock on POSIX, msvcrt.locking on Windows. Every held() opens its own
+    handle, so threads of one process exclude each other as well as other
+    processes. Being advisory, it only keeps out writers that take it too.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def held(self):
+        """Hold the lock for the body of a with block, waiting for it if need be"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        # LK_LOCK gives up after ten seconds; keep waiting
+                        continue
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _write_json_atomic(path, data):
+    """Write JSON to a temp file, fsync it and rename it over path"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2, default=json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class VaultStorage:
+    """Interface shared by the vault storage backends
+
+    Mutations are ("add", entry) or ("delete", entry) tuples. An add for an
+    existing website/username replaces that entry.
+    """
+
+    # Backends that can filter the Saved tab themselves set this
+    supports_search = False
+    # Set when background maintenance (journal compaction) failed, for the UI to report
+    compaction_error = None
+
+    def load(self):
+        """Return the vault data as {"websites": [entry, ...]}"""
+        raise NotImplementedError
+
+    def apply(self, mutations):
+        """Persist a batch of mutations"""
+        raise NotImplementedError
+
+    def search(self, query):
+        """(website, username) pairs matching query, or None to search in memory"""
+        return None
+
+    def refresh(self):
+        """Mutations other processes saved since the last load, apply or refresh"""
+        return []
+
+    def watch_paths(self):
+        """Files whose changes mean refresh() may have something to report"""
+        return ()
+
+    def compact_now(self):
+        """Rewrite the stored vault so replaced and deleted data is gone from disk"""
+
+    def close(self):
+        """Finish pending work and release files"""
+
+
+class JournalStorage(VaultStorage):
+    """Vault snapshot plus an append-only journal of mutations
+
+    The snapshot is password_vault.json in its existing schema. Each add or
+    delete is appended to the journal as one JSON line, so a write costs the
+    same however big the vault is, and a crash can at worst tear the last
+    journal line. Once the journal grows past compact_bytes it is rotated
+    aside and a background thread writes a new snapshot, swaps it in with
+    os.replace and removes the rotated journal.
+
+    Replaying the journal is idempotent (add overwrites, delete ignores
+    missing entries), so an interrupted compaction can safely replay a
+    journal the snapshot already contains.
+
+    Several processes may share one vault. Every read and write of the
+    files happens under an advisory lock, and each process remembers how
+    far into each journal it has read. Before appending, the lines other
+    processes added since are replayed into the mirror, so a snapshot never
+    drops their entries; refresh() hands those changes to the caller. Only
+    when another process has written a new snapshot is the vault re-read,
+    and even then just the differences are reported.
+    """
+
+    def __init__(self, path, compact_bytes=JOURNAL_COMPACT_BYTES):
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + ".journal"
+        self.rotated_path = self.journal_path + ".compacting"
+        self.lock = FileLock(os.path.splitext(path)[0] + ".lock")
+        self.compact_bytes = compact_bytes
+        self.compaction_error = None
+        self._entries = {}
+        self._extra = {}
+        self._compactor = None
+        # Serializes load, apply and refresh between this process's threads
+        self._mutex = threading.Lock()
+        self._loaded = False
+        # How far this process has read: the snapshot it saw and an offset per journal file
+        self._snapshot_seen = None
+        self._positions = {}
+        # Other processes' changes picked up while applying, kept for refresh()
+        self._external = []
+
+    def exists(self):
+        """Whether there is any vault data on disk yet"""
+        return any(os.path.exists(path) for path in (self.path, self.journal_path, self.rotated_path))
+
+    def watch_paths(self):
+        return (self.path, self.journal_path)
+
+    def load(self):
+        """Return the vault data: the snapshot with every journaled mutation replayed"""
+        with self._mutex, self.lock.held():
+            self._extra, self._entries = self._read()
+            if os.path.exists(self.rotated_path):
+                # A compaction never finished (or another process's compactor hasn't
+                # started yet, and will stand down); fold everything into a snapshot now
+                self._write_snapshot(list(self._entries.values()))
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                os.remove(self.rotated_path)
+                self._snapshot_seen = _stamp(self.path)
+                self._positions = {}
+            else:
+                self._drop_torn_tail()
+            self._external = []
+            self._loaded = True
+            return dict(self._extra, websites=list(self._entries.values()))
+
+    def _read(self):
+        """Read the snapshot and replay the journals into a new mirror, noting how far we got"""
+        self._snapshot_seen = _stamp(self.path)
+        data = {"websites": []}
+        if self._snapshot_seen is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {"websites": []}
+        extra = {key: value for key, value in data.items() if key != "websites"}
+        entries = {}
+        for entry in data.get("websites", []):
+            entry = Record.from_dict(entry)
+            entries.setdefault(entry_key(entry), entry)
+
+        self._positions = {}
+        for path in (self.rotated_path, self.journal_path):
+            inode = _inode(path)
+            if inode is not None:
+                _, self._positions[inode] = self._replay(entries, path)
+        return extra, entries
+
+    def _replay(self, entries, path, offset=0):
+        """Apply the complete records in a journal file from offset on
+
+        Returns the changes as mutations (deletes carry the entry they
+        removed) and the offset just past the last complete line.
+        """
+        changes = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("op") == "add":
+                    entry = Record.from_dict(record["entry"])
+                    entries[entry_key(entry)] = entry
+                    changes.append(("add", entry))
+                elif record.get("op") == "delete":
+                    removed = entries.pop(normalize_key(record["website"], record["username"]), None)
+                    if removed is not None:
+                        changes.append(("delete", removed))
+        return changes, offset
+
+    def _drop_torn_tail(self):
+        """Cut a half-written record off the journal so later appends start on a fresh line"""
+        inode = _inode(self.journal_path)
+        if inode is None:
+            return
+        good_size = self._positions.get(inode, 0)
+        if good_size < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_size)
+
+    def _catch_up(self):
+        """Replay what other processes wrote since we last looked, returning those changes"""
+        if _stamp(self.path) != self._snapshot_seen:
+            return self._resync()
+        changes = []
+        positions = {}
+        # The rotated journal holds older records than the live one
+        for path in (self.rotated_path, self.journal_path):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            offset = self._positions.get(inode, 0)
+            if st.st_size > offset:
+                more, offset = self._replay(self._entries, path, offset)
+                changes.extend(more)
+            positions[inode] = offset
+        self._positions = positions
+        return changes
+
+    def _resync(self):
+        """Re-read a vault another process compacted, returning how it differs from the mirror"""
+        old = self._entries
+        self._extra, self._entries = self._read()
+        changes = [("add", entry) for key, entry in self._entries.items()
+                   if key not in old or not _same_entry(old[key], entry)]
+        changes.extend(("delete", entry) for key, entry in old.items() if key not in self._entries)
+        return changes
+
+    def refresh(self):
+        """Changes other processes saved since this one last read the vault"""
+        with self._mutex:
+            if not self._loaded:
+                return []
+            with self.lock.held():
+                changes = self._external + self._catch_up()
+            self._external = []
+        return changes
+
+    def apply(self, mutations):
+        """Append mutations to the journal and apply them to the snapshot mirror"""
+        lines = []
+        updates = []
+        for op, entry in mutations:
+            if op == "add":
+                updates.append((entry_key(entry), Record.from_dict(entry)))
+                lines.append(json.dumps({"op": "add", "entry": entry}, default=json_default))
+            elif op == "delete":
+                updates.append((entry_key(entry), None))
+                lines.append(json.dumps({"op": "delete", "website": entry["website"],
+                                         "username": entry["username"]}))
+            else:
+                raise ValueError(f"Unknown vault mutation: {op}")
+        if not lines:
+            return
+
+        with self._mutex, self.lock.held():
+            # Pick up other processes' writes first, so the mirror (and the next snapshot) keeps them
+            self._external.extend(self._catch_up())
+            for key, entry in updates:
+                if entry is None:
+                    self._entries.pop(key, None)
+                else:
+                    self._entries[key] = entry
+            if self._append(lines) >= self.compact_bytes and not self.compacting():
+                self._start_compaction()
+
+    def _append(self, lines):
+        """Write lines to the journal durably, returning its new size"""
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._drop_torn_tail()
+        with open(self.journal_path, "ab") as f:
+            f.write(("\n".join(lines) + "\n").encode())
+            f.flush()
+            os.fsync(f.fileno())
+            st = os.fstat(f.fileno())
+        self._positions[(st.st_dev, st.st_ino)] = st.st_size
+        return st.st_size
+
+    def compacting(self):
+        """Whether a background snapshot is being written"""
+        return self._compactor is not None and self._compactor.is_alive()
+
+    def _start_compaction(self):
+        # New mutations go to a fresh journal while the snapshot is written
+        if os.path.exists(self.rotated_path):
+            # A failed compaction left records that are not in the snapshot yet
+            with open(self.journal_path, "rb") as src, open(self.rotated_path, "ab") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.rotated_path)
+        st = os.stat(self.rotated_path)
+        # The mirror is caught up, so it already holds everything in the rotated journal
+        self._positions = {(st.st_dev, st.st_ino): st.st_size}
+        entries = list(self._entries.values())
+        rotated = (st.st_dev, st.st_ino, st.st_size)
+        self._compactor = threading.Thread(target=self._compact, args=(entries, rotated), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, entries, rotated):
+        try:
+            with self.lock.held():
+                st = _stat(self.rotated_path)
+                if st is None or (st.st_dev, st.st_ino, st.st_size) != rotated:
+                    # Another process already folded the rotated journal into a snapshot
+                    return
+                self._write_snapshot(entries)
+                os.remove(self.rotated_path)
+                self._positions.pop(rotated[:2], None)
+                self._snapshot_seen = _stamp(self.path)
+            self.compaction_error = None
+        except OSError as e:
+            # The rotated journal is kept and folded in on the next load
+            self.compaction_error = e
+
+    def compact_now(self):
+        """Write a snapshot right away and remove both journals"""
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._mutex, self.lock.held():
+            self._external.extend(self._catch_up())
+            self._write_snapshot(list(self._entries.values()))
+            for path in (self.journal_path, self.rotated_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._positions = {}
+            self._snapshot_seen = _stamp(self.path)
+
+    def _write_snapshot(self, entries):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        _write_json_atomic(self.path, dict(self._extra, websites=entries))
+
+    def close(self):
+        """Wait for any running compaction to finish"""
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+class SqliteStorage(VaultStorage):
+    """Vault stored in an SQLite database, one row per entry
+
+    A unique index on the normalized (website, username) pair enforces the
+    same dedupe rule as PasswordIndex, and every mutation is a single-row
+    INSERT/DELETE instead of a file rewrite.
+    """
+
+    supports_search = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS websites (
+            id INTEGER PRIMARY KEY,
+            website TEXT NOT NULL,
+            username TEXT NOT NULL,
+            password TEXT NOT NULL,
+            date_added TEXT NOT NULL,
+            date_changed TEXT,
+            website_key TEXT NOT NULL,
+            username_key TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS websites_key ON websites (website_key, username_key);
+        CREATE INDEX IF NOT EXISTS websites_username ON websites (username_key);
+    """
+
+    def __init__(self, path):
+        # Only imported when the SQLite backend is actually in use
+        import sqlite3
+
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Writes may come from a background thread, so serialize access ourselves
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            # Zero deleted rows instead of leaving them in free pages
+            self._conn.execute("PRAGMA secure_delete = ON")
+            self._conn.executescript(self.SCHEMA)
+            # Databases made before password history have no date_changed column
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(websites)")]
+            if "date_changed" not in columns:
+                self._conn.execute("ALTER TABLE websites ADD COLUMN date_changed TEXT")
+
+    def load(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT website, username, password, date_added, date_changed FROM websites ORDER BY id"
+            ).fetchall()
+        return {"websites": [Record(*row[:4], extra={"date_changed": row[4]} if row[4] else None)
+                             for row in rows]}
+
+    def apply(self, mutations):
+        with self._lock, self._conn:
+            for op, entry in mutations:
+                website_key, username_key = entry_key(entry)
+                if op == "add":
+                    self._conn.execute(
+                        "INSERT INTO websites (website, username, password, date_added, date_changed, "
+                        "website_key, username_key) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (website_key, username_key) DO UPDATE SET "
+                        "website = excluded.website, username = excluded.username, "
+                        "password = excluded.password, date_added = excluded.date_added, "
+                        "date_changed = excluded.date_changed",
+                        (entry["website"], entry["username"], entry["password"], entry["date_added"],
+                         entry.get("date_changed"), website_key, username_key))
+                elif op == "delete":
+                    self._conn.execute(
+                        "DELETE FROM websites WHERE website_key = ? AND username_key = ?",
+                        (website_key, username_key))
+                else:
+                    raise ValueError(f"Unknown vault mutation: {op}")
+
+    def compact_now(self):
+        """Rebuild the database file so no free page keeps old rows"""
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+    def search(self, query):
+        """Entries whose website or username starts with query, found through the indexes
+
+        The Saved tab filters by prefix with this backend: a substring
+        match can't use an index and would scan the whole table.
+        """
+        low = query.strip().lower()
+        # Every string with this prefix sorts inside [low, high)
+        high = low + "\U0010ffff"
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, website, username FROM websites WHERE website_key >= ? AND website_key < ? "
+                "UNION "
+                "SELECT id, website, username FROM websites WHERE username_key >= ? AND username_key < ? "
+                "ORDER BY id",
+                (low, high, low, high)).fetchall()
+        return [(website, username) for _, website, username in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class BackgroundWriter:
+    """Applies storage mutations on a writer thread, one write per burst
+
+    submit() only queues mutations and marks the writer dirty, so the Tk
+    event loop never waits on disk. The writer thread waits briefly for a
+    burst to settle, then hands everything queued to storage.apply in a
+    single call. Failures are put on the errors queue for the UI to poll.
+    """
+
+    def __init__(self, storage, delay=WRITE_COALESCE_SECONDS):
+        self.storage = storage
+        self.delay = delay
+        self.errors = queue.Queue()
+        self._pending = []
+        self._dirty = False
+        self._busy = False
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, *mutations):
+        """Queue mutations to be written in the background"""
+        with self._cond:
+            self._pending.extend(mutations)
+            self._dirty = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._closed)
+                if not self._dirty:
+                    return
+                # Let the rest of a burst arrive, unless we are shutting down
+                self._cond.wait_for(lambda: self._closed, timeout=self.delay)
+                batch, self._pending = self._pending, []
+                self._dirty = False
+                self._busy = True
+            try:
+                with metrics.timer("storage.apply"):
+                    self.storage.apply(batch)
+                metrics.incr("storage.mutations", len(batch))
+            except Exception as e:
+                self.errors.put(e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has been written"""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._dirty and not self._busy, timeout)
+
+    def close(self):
+        """Write anything still queued, stop the thread and close the storage"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.storage.close()
+
+
+def migrate_json_to_sqlite(json_path, sqlite_path):
+    """Copy a JSON vault (snapshot + journal) into an SQLite vault, returning the entry count"""
+    source = JournalStorage(json_path)
+    entries = source.load()["websites"]
+    source.close()
+    target = SqliteStorage(sqlite_path)
+    try:
+        target.apply([("add", entry) for entry in entries])
+    finally:
+        target.close()
+    return len(entries)
+
+
+def open_storage(data_file, backend=DEFAULT_BACKEND):
+    """Open the storage backend for a vault, migrating JSON data into a new SQLite vault"""
+    if backend == "json":
+        return JournalStorage(data_file)
+    if backend == "sqlite":
+        db_path = os.path.splitext(data_file)[0] + ".db"
+        if not os.path.exists(db_path) and JournalStorage(data_file).exists():
+            migrate_json_to_sqlite(data_file, db_path)
+        return SqliteStorage(db_path)
+    if backend == "daemon":
+        # Imported here since the daemon module builds on this one
+        from vault_daemon import DaemonStorage
+        return DaemonStorage()
+    raise ValueError(f"Unknown vault backend: {backend}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Password vault storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="copy a JSON vault into an SQLite database")
+    migrate.add_argument("json_path")
+    migrate.add_argument("sqlite_path")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        count = migrate_json_to_sqlite(args.json_path, args.sqlite_path)
+        print(f"Migrated {count} entries to {args.sqlite_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import select
+import struct
+import sys
+import threading
+
+# How often the polling watcher looks at the files
+POLL_INTERVAL_SECONDS = 1.0
+
+# inotify events on a directory that can mean a watched file changed:
+# IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_MASK = 0x002 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200
+# struct inotify_event: wd, mask, cookie, name length, then the name
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def _signature(path):
+    """What the polling watcher compares: inode, size and mtime, or None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class PollingWatcher:
+    """Calls on_change when one of paths changes, by stat()ing them every interval
+
+    Works everywhere, at the cost of noticing changes up to interval
+    seconds late. on_change runs on the watcher thread.
+    """
+
+    def __init__(self, paths, on_change, interval=POLL_INTERVAL_SECONDS):
+        self.paths = list(paths)
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        seen = [_signature(path) for path in self.paths]
+        while not self._stop.wait(self.interval):
+            now = [_signature(path) for path in self.paths]
+            if now != seen:
+                seen = now
+                self.on_change()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class InotifyWatcher:
+    """Calls on_change as soon as one of paths changes, via Linux inotify
+
+    The directories are watched rather than the files, since snapshots are
+    replaced by rename and journals come and go. inotify is reached
+    through ctypes, so there is nothing extra to install. Raises OSError
+    if inotify isn't available; on_change runs on the watcher thread.
+    """
+
+    def __init__(self, paths, on_change):
+        # Only needed on Linux
+        import ctypes
+
+        self.on_change = on_change
+        self._names = {os.path.basename(path) for path in paths}
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+            if libc.inotify_add_watch(self._fd, os.fsencode(directory), INOTIFY_MASK) < 0:
+                errno = ctypes.get_errno()
+                os.close(self._fd)
+                raise OSError(errno, f"Cannot watch {directory}")
+        # stop() writes to this pipe to wake the thread out of select()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            ready, _, _ = select.select([self._fd, self._wake_r], [], [])
+            if self._wake_r in ready:
+                return
+            if self._relevant(os.read(self._fd, 64 * 1024)):
+                self.on_change()
+
+    def _relevant(self, data):
+        """Whether a buffer of inotify events names one of the watched files"""
+        pos = 0
+        while pos < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, pos)
+            pos += INOTIFY_EVENT.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+            pos += length
+            if name in self._names:
+                return True
+        return False
+
+    def stop(self):
+        os.write(self._wake_w, b"x")
+        self._thread.join()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+def watch(paths, on_change):
+    """Start the best watcher available for paths: inotify on Linux, polling elsewhere"""
+    watcher = None
+    if sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(paths, on_change)
+        except OSError:
+            watcher = None
+    if watcher is None:
+        watcher = PollingWatcher(paths, on_change)
+    watcher.start()
+    return watcher
@@ -0,0 +1,181 @@
+from tkinter import ttk
+
+from vault_diagnostics import metrics
+
+
+class VirtualTreeview:
+    """Treeview that only materializes the rows currently in view
+
+    The full list of rows lives in Python. A small pool of Treeview items
+    (the visible rows plus a buffer) is reused and refilled as the view
+    scrolls, so redraw cost does not depend on how many rows there are.
+    """
+
+    def __init__(self, parent, columns, row_values, height=15, buffer=5):
+        self.tree = ttk.Treeview(parent, columns=columns, show="headings", height=height)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.row_values = row_values
+        self.buffer = buffer
+        self.visible = height
+        self.rows = []
+        self.offset = 0
+        self.selected = None
+        self._items = []
+        self._item_rows = {}
+
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._on_wheel_rows(-3))
+        self.tree.bind("<Button-5>", lambda event: self._on_wheel_rows(3))
+        self.tree.bind("<Up>", lambda event: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda event: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda event: self._move_selection(-self.visible))
+        self.tree.bind("<Next>", lambda event: self._move_selection(self.visible))
+
+    def set_rows(self, rows):
+        """Replace every row, scrolling back to the top"""
+        # Copy so insert_row/remove_row never mutate the caller's list
+        self.rows = list(rows)
+        self.offset = 0
+        self.selected = None
+        self.refresh()
+
+    def selected_row(self):
+        """The row the user last selected, or None"""
+        return self.selected
+
+    def append_rows(self, rows):
+        """Add rows at the end, redrawing only while they land inside the view"""
+        start = len(self.rows)
+        self.rows.extend(rows)
+        if start < self.offset + self.visible + self.buffer:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def insert_row(self, row, position=None):
+        """Add one row, redrawing only if it lands inside the view"""
+        if position is None:
+            position = len(self.rows)
+        self.rows.insert(position, row)
+        if position < self.offset:
+            # Keep the same rows on screen
+            self.offset += 1
+        if position < self.offset + self.visible + self.buffer:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def remove_row(self, row):
+        """Remove one row, keeping the selection and scroll position"""
+        position = self._position(row)
+        if position is None:
+            return
+        del self.rows[position]
+        if row is self.selected:
+            self.selected = None
+        if position < self.offset:
+            self.offset -= 1
+            self._update_scrollbar()
+        elif position < self.offset + len(self._items):
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def _position(self, row):
+        """Index of row in self.rows, looking at the visible window first"""
+        for i, iid in enumerate(self._items):
+            if self._item_rows.get(iid) is row:
+                return self.offset + i
+        for i, candidate in enumerate(self.rows):
+            if candidate is row:
+                return i
+        return None
+
+    @metrics.timed("tree.refresh")
+    def refresh(self):
+        """Refill the item pool from the rows at the current offset"""
+        self.offset = max(0, min(self.offset, len(self.rows) - self.visible))
+        window = self.rows[self.offset:self.offset + self.visible + self.buffer]
+
+        while len(self._items) < len(window):
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > len(window):
+            self.tree.delete(self._items.pop())
+
+        self._item_rows = {}
+        selection = []
+        for iid, row in zip(self._items, window):
+            self.tree.item(iid, values=self.row_values(row))
+            self._item_rows[iid] = row
+            if row is self.selected:
+                selection.append(iid)
+        self.tree.selection_set(selection)
+        # The pool is scrolled by us, never by the Treeview itself
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def yview(self, *args):
+        """Scrollbar command: handles both 'moveto' and 'scroll' requests"""
+        if args[0] == "moveto":
+            self.offset = int(float(args[1]) * len(self.rows))
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible
+            self.scroll(amount)
+
+    def scroll(self, rows):
+        """Move the view by a number of rows"""
+        self.offset += rows
+        self.refresh()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+
+    def _on_configure(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        # Leave room for the column headings
+        visible = max(1, (event.height - rowheight) // rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        # An empty selection just means the selected row is scrolled away
+        if selection and selection[0] in self._item_rows:
+            self.selected = self._item_rows[selection[0]]
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS reports small deltas
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._on_wheel_rows(-step * 3)
+
+    def _on_wheel_rows(self, rows):
+        # Stop the Treeview class binding from scrolling the item pool
+        self.scroll(rows)
+        return "break"
+
+    def _move_selection(self, delta):
+        if not self.rows:
+            return "break"
+        position = self.offset - 1 if delta > 0 else self.offset + self.visible
+        for i, iid in enumerate(self._items):
+            if self._item_rows.get(iid) is self.selected:
+                position = self.offset + i
+                break
+        position = max(0, min(position + delta, len(self.rows) - 1))
+        self.selected = self.rows[position]
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.visible:
+            self.offset = position - self.visible + 1
+        self.refresh()
+        return "break"
@@ -0,0 +1,98 @@
+import mmap
+import os
+import struct
+
+# File layout: MAGIC, the word count, count + 1 offsets into the word data,
+# then the words as UTF-8 back to back. Word i is data[offsets[i]:offsets[i + 1]].
+MAGIC = b"PVWORDS1"
+HEADER = struct.Struct("<8sI")
+OFFSET = struct.Struct("<I")
+# A word's start and end offsets, read together
+SPAN = struct.Struct("<II")
+
+# Fewer words than this make for weak passphrases, so convert_wordlist refuses
+MIN_WORDS = 1000
+
+
+def default_wordlist_file():
+    """Binary diceware wordlist: $PASSWORD_VAULT_WORDLIST or next to the vault"""
+    return os.environ.get("PASSWORD_VAULT_WORDLIST") or os.path.join(
+        os.path.expanduser("~/Documents"), "diceware-words.bin")
+
+
+class Wordlist:
+    """Diceware wordlist read through mmap from the binary format
+
+    Opening reads only the header, so startup cost doesn't depend on the
+    list's size, and word i is found from its two offsets without scanning.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a wordlist (convert one with vault_cli.py wordlist-convert)")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map)
+        self._data = HEADER.size + (self.count + 1) * OFFSET.size
+        valid = magic == MAGIC and self.count > 0 and self._data <= size
+        # The last offset is where the word data ends, which must be the end of the file
+        if not valid or self._data + OFFSET.unpack_from(self._map, self._data - OFFSET.size)[0] != size:
+            self.close()
+            raise ValueError(f"{path} is not a wordlist (convert one with vault_cli.py wordlist-convert)")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = SPAN.unpack_from(self._map, HEADER.size + i * OFFSET.size)
+        return self._map[self._data + start:self._data + end].decode("utf-8")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def open_wordlist(path=None):
+    """Wordlist for the configured file, or None when there isn't one"""
+    path = path or default_wordlist_file()
+    if not os.path.exists(path):
+        return None
+    return Wordlist(path)
+
+
+def _parse_words(lines):
+    """Words from a plain or EFF-style ('11111<TAB>abacus') list, in order, without repeats"""
+    seen = set()
+    for line in lines:
+        fields = line.split()
+        # The word is the last field; a leading field is the dice roll
+        if not fields or fields[0].startswith("#"):
+            continue
+        word = fields[-1]
+        if word not in seen:
+            seen.add(word)
+            yield word
+
+
+def convert_wordlist(src, dst, min_words=MIN_WORDS):
+    """Convert a text wordlist to the binary format, returning the word count"""
+    with open(src, "r", encoding="utf-8") as f:
+        words = [word.encode("utf-8") for word in _parse_words(f)]
+    if len(words) < min_words:
+        raise ValueError(f"{src} has {len(words)} distinct words; passphrases need at least {min_words}")
+
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    tmp_dst = dst + ".tmp"
+    with open(tmp_dst, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(words)))
+        out.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        out.write(b"".join(words))
+    os.replace(tmp_dst, dst)
+    return len(words)